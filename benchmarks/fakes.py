@@ -0,0 +1,409 @@
+"""Deterministic offline stand-ins for every upstream the agents call
+
+Each fake sleeps according to a LatencyModel and can fail at a configured
+rate, so benchmarks exercise the real agent code without network access.
+"""
+import io
+import random
+import threading
+import time
+import wave
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+AGENT_KEYWORDS = {
+    "calendar": ("calendar", "meeting", "schedule", "event"),
+    "email": ("email", "send", "mail"),
+    "contact": ("contact", "phone", "address", "number"),
+    "expense": ("spend", "spent", "expense", "transaction", "cost", "bought"),
+}
+
+
+class UpstreamError(Exception):
+    """Simulated upstream failure carrying an HTTP-style status code"""
+
+    def __init__(self, upstream: str, status_code: int = 503):
+        super().__init__(f"{upstream} returned {status_code}")
+        self.status_code = status_code
+
+
+class LatencyModel:
+    """Gaussian latency (clamped at zero) with a random error rate"""
+
+    def __init__(self, name: str, mean_ms: float = 50.0, jitter_ms: float = 10.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.name = name
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(f"{seed}:{name}")
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_profile(cls, name: str, profile: Dict, seed: int = 0) -> "LatencyModel":
+        settings = profile.get(name, {})
+        return cls(name, settings.get("mean_ms", 50.0), settings.get("jitter_ms", 10.0),
+                   settings.get("error_rate", 0.0), seed)
+
+    def wait(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._random.gauss(self.mean_ms, self.jitter_ms)) / 1000.0
+            failed = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if failed:
+            raise UpstreamError(self.name)
+
+
+def route_for(text: str) -> str:
+    lowered = text.lower()
+    for agent, keywords in AGENT_KEYWORDS.items():
+        if any(keyword in lowered for keyword in keywords):
+            return agent
+    return "end"
+
+
+# -- LLMs --------------------------------------------------------------------
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that routes, calls one tool and answers deterministically"""
+
+    latency: Any = None
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(tool, "name", None) or tool.get("name") for tool in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _tool_call(self, text: str) -> Optional[Dict]:
+        route = route_for(text)
+        candidates = {
+            "calendar": ("get_events", {}),
+            "contact": ("get_contact", {"name": "John"}),
+            "email": ("send_email", {"to": "john@example.com", "subject": "Notes", "body": text}),
+            "expense": ("query_expenses", {"query": text}),
+        }
+        for name, args in [candidates.get(route)] + list(candidates.values()):
+            if name in self.tool_names:
+                return {"name": name, "args": args, "id": f"call_{name}", "type": "tool_call"}
+        return None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency is not None:
+            self.latency.wait()
+        system = " ".join(str(m.content) for m in messages if m.type == "system")
+        last = str(messages[-1].content)
+        human = next((str(m.content) for m in reversed(messages) if m.type == "human"), last)
+
+        if "Respond with ONLY the agent name" in system:
+            message = AIMessage(content=route_for(human))
+        elif "Rewrite" in human and "JARVIS" in human:
+            message = AIMessage(content=human.split("\n\n", 1)[-1])
+        elif self.tool_names and not any(isinstance(m, ToolMessage) for m in messages):
+            call = self._tool_call(human)
+            message = AIMessage(content="", tool_calls=[call] if call else [])
+            if not call:
+                message = AIMessage(content=f"Handled: {human}")
+        else:
+            results = [str(m.content) for m in messages if isinstance(m, ToolMessage)]
+            message = AIMessage(content="Done. " + " ".join(results)[:500])
+        message.usage_metadata = {
+            "input_tokens": sum(len(str(m.content).split()) for m in messages),
+            "output_tokens": len(str(message.content).split()) + 5,
+            "total_tokens": 0,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def chat_model_factory(latency: LatencyModel):
+    """Drop-in replacement for ChatGoogleGenerativeAI(...)"""
+    def factory(*args, rate_limiter=None, callbacks=None, **kwargs):
+        return FakeChatModel(latency=latency, rate_limiter=rate_limiter, callbacks=callbacks)
+    return factory
+
+
+class FakeEmbeddings:
+    def __init__(self, latency: LatencyModel, dim: int = 64):
+        self.latency = latency
+        self.dim = dim
+
+    def _vector(self, text: str) -> List[float]:
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(self.dim)]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency.wait()
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.latency.wait()
+        return [self._vector(text) for text in texts]
+
+
+# -- Airtable ----------------------------------------------------------------
+
+class FakeAirtableTable:
+    def __init__(self, latency: LatencyModel, contacts: List[Dict] = None):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.records = [
+            {"id": f"rec{i}", "fields": fields}
+            for i, fields in enumerate(contacts or [
+                {"Name": "John", "Email": "john@example.com", "Phone": "555-0100", "Group": "team"},
+                {"Name": "Sarah", "Email": "sarah@example.com", "Phone": "555-0101", "Group": "team"},
+                {"Name": "Mike", "Email": "mike@example.com", "Phone": "555-0102", "Group": "family"},
+            ])
+        ]
+
+    def all(self, formula: str = None, **kwargs) -> List[Dict]:
+        self.latency.wait()
+        with self._lock:
+            records = list(self.records)
+        if not formula:
+            return records
+        lowered = formula.lower()
+        return [r for r in records if f"'{r['fields'].get('Name', '').lower()}'" in lowered
+                or any(f"',{group.strip().lower()},'" in lowered
+                       for group in r['fields'].get('Group', '').split(',') if group.strip())]
+
+    def create(self, fields: Dict) -> Dict:
+        return self.batch_create([fields])[0]
+
+    def batch_create(self, records: List[Dict]) -> List[Dict]:
+        self.latency.wait()
+        with self._lock:
+            created = []
+            for fields in records:
+                record = {"id": f"rec{len(self.records)}", "fields": fields}
+                self.records.append(record)
+                created.append(record)
+            return created
+
+
+def airtable_factory(table: FakeAirtableTable):
+    def factory(*args, **kwargs):
+        return table
+    return factory
+
+
+# -- Google Calendar -----------------------------------------------------------
+
+class _Request:
+    def __init__(self, latency: LatencyModel, result):
+        self.latency = latency
+        self.result = result
+
+    def execute(self):
+        self.latency.wait()
+        return self.result() if callable(self.result) else self.result
+
+
+class FakeCalendarService:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.events_store = [
+            {"id": "evt1", "summary": "Standup", "start": {"dateTime": "2026-01-05T09:00:00Z"}},
+            {"id": "evt2", "summary": "Dentist", "start": {"dateTime": "2026-01-06T15:00:00Z"}},
+        ]
+
+    def events(self):
+        return self
+
+    def list(self, **kwargs):
+        return _Request(self.latency, lambda: {"items": list(self.events_store)})
+
+    def insert(self, calendarId=None, body=None):
+        def create():
+            event = dict(body, id=f"evt{len(self.events_store) + 1}")
+            self.events_store.append(event)
+            return event
+        return _Request(self.latency, create)
+
+    def delete(self, calendarId=None, eventId=None):
+        return _Request(self.latency, {})
+
+
+# -- Google Sheets ---------------------------------------------------------------
+
+class FakeSheetsClient:
+    """Stands in for SheetsClient with a synthetic transaction sheet"""
+
+    MERCHANTS = [("Uber", "Travel"), ("Starbucks", "Food"), ("Amazon", "Shopping"),
+                 ("Whole Foods", "Groceries"), ("Netflix", "Entertainment"), ("Shell", "Travel")]
+
+    def __init__(self, latency: LatencyModel, rows: int = 2000, seed: int = 0):
+        self.latency = latency
+        rng = random.Random(seed)
+        self.header_row = ["Date", "Description", "Merchant", "Category", "Amount"]
+        self.rows = []
+        for i in range(rows):
+            merchant, category = rng.choice(self.MERCHANTS)
+            month, day = rng.randint(1, 12), rng.randint(1, 28)
+            self.rows.append([f"2025-{month:02d}-{day:02d}", f"{merchant} purchase", merchant,
+                              category, f"{rng.uniform(3, 200):.2f}"])
+
+    def header(self) -> List[str]:
+        self.latency.wait()
+        return self.header_row
+
+    def read_rows(self, start_row: int, num_columns: int, chunk_size: int = 500):
+        row = start_row
+        while True:
+            self.latency.wait()
+            values = self.rows[row - 2:row - 2 + chunk_size]
+            for offset, value in enumerate(values):
+                yield row + offset, value
+            if len(values) < chunk_size:
+                return
+            row += chunk_size
+
+
+def sheets_factory(client: FakeSheetsClient):
+    def factory(*args, **kwargs):
+        return client
+    return factory
+
+
+# -- Pinecone --------------------------------------------------------------------
+
+class FakePineconeIndex:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.vectors: Dict[str, Dict] = {}
+
+    def upsert(self, vectors: List[Dict], **kwargs):
+        self.latency.wait()
+        for vector in vectors:
+            self.vectors[vector["id"]] = vector
+
+    def query(self, vector=None, top_k: int = 5, include_metadata: bool = True, **kwargs):
+        self.latency.wait()
+        matches = [
+            {"id": key, "score": 0.5, "metadata": value.get("metadata", {})}
+            for key, value in list(self.vectors.items())[:top_k]
+        ]
+        if not matches:
+            matches = [{"id": "seed", "score": 0.5, "metadata": {
+                "description": "Starbucks purchase", "amount": 4.5, "date": "2025-06-01", "category": "Food"}}]
+        return {"matches": matches}
+
+
+class FakePinecone:
+    def __init__(self, index: FakePineconeIndex):
+        self.index = index
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def Index(self, name):
+        return self.index
+
+
+# -- SMTP ------------------------------------------------------------------------
+
+class FakeSMTP:
+    """Minimal smtplib.SMTP replacement; latency is paid on connect and send"""
+
+    latency: LatencyModel = None
+    sent = 0
+
+    def __init__(self, host=None, port=None, timeout=None):
+        FakeSMTP.latency.wait()
+
+    def starttls(self):
+        FakeSMTP.latency.wait()
+
+    def login(self, user, password):
+        FakeSMTP.latency.wait()
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        FakeSMTP.latency.wait()
+        FakeSMTP.sent += 1
+        return {}
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# -- ElevenLabs and speech recognition -------------------------------------------
+
+class _FakeResponse:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+        self.text = ""
+        self.headers = {}
+
+
+class FakeRequests:
+    """Replaces the requests module used by TextToSpeechHandler"""
+
+    def __init__(self, latency: LatencyModel, bytes_per_char: int = 300):
+        self.latency = latency
+        self.bytes_per_char = bytes_per_char
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        try:
+            self.latency.wait()
+        except UpstreamError as e:
+            return _FakeResponse(b"", e.status_code)
+        text = (json or {}).get("text", "")
+        if str((kwargs.get("params") or {}).get("output_format", "")).startswith("opus"):
+            # 32 kbps Opus is about a quarter of the default 128 kbps MP3
+            body = b"OggS" + b"\x00" * 24 + b"OpusHead"
+            return _FakeResponse(body + b"\x00" * (len(text) * self.bytes_per_char // 4))
+        return _FakeResponse(b"\xff\xf3" * (len(text) * self.bytes_per_char // 2 + 1))
+
+
+def silent_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+# Voice notes in benchmarks carry their transcript as the file contents
+_transcript = threading.local()
+
+
+class FakeAudioSegment:
+    """Replaces pydub.AudioSegment for decoding voice notes"""
+
+    latency: LatencyModel = None
+
+    @classmethod
+    def from_file(cls, path, *args, **kwargs):
+        if cls.latency is not None:
+            cls.latency.wait()
+        with open(path, "rb") as f:
+            _transcript.text = f.read().decode("utf-8", "ignore")
+        return cls()
+
+    def export(self, out, format="wav", **kwargs):
+        out.write(silent_wav())
+        return out
+
+
+def fake_recognizer(latency: LatencyModel):
+    """recognize_google replacement returning the decoded note's transcript"""
+    def recognize_google(audio_data, *args, **kwargs):
+        latency.wait()
+        return getattr(_transcript, "text", "")
+    return recognize_google
@@ -0,0 +1,262 @@
+"""Load-testing harness that replays Telegram updates through TelegramHandler
+
+install_fakes() swaps every upstream client for a fake from benchmarks.fakes,
+then replay() feeds updates into the real handler at a target rate and
+collects end-to-end and per-stage latency from the telemetry traces.
+
+replay() calls handle_text/handle_voice directly instead of going through
+Application.process_update, and dispatches each update as its own task.
+PTB's update routing is not measured, and updates run concurrently even
+though each bot process handles one update at a time (PTB's default
+concurrent_updates=False; WORKERS > 1 adds processes). The numbers are
+the capacity of the handler itself, not of a single polling process.
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from typing import Dict, List
+from unittest import mock
+
+from benchmarks import fakes
+from src.config import Config
+from src.utils import telemetry
+
+DEFAULT_PROFILE = {
+    "llm": {"mean_ms": 300, "jitter_ms": 80},
+    "embeddings": {"mean_ms": 80, "jitter_ms": 20},
+    "airtable": {"mean_ms": 120, "jitter_ms": 30},
+    "calendar": {"mean_ms": 150, "jitter_ms": 40},
+    "sheets": {"mean_ms": 200, "jitter_ms": 50},
+    "pinecone": {"mean_ms": 60, "jitter_ms": 15},
+    "smtp": {"mean_ms": 100, "jitter_ms": 25},
+    "tts": {"mean_ms": 400, "jitter_ms": 100},
+    "stt": {"mean_ms": 250, "jitter_ms": 60},
+    "audio_decode": {"mean_ms": 20, "jitter_ms": 5},
+}
+
+SYNTHETIC_QUERIES = [
+    "What's on my calendar this week?",
+    "Schedule a meeting with John tomorrow at 3pm",
+    "Send an email to John about the quarterly report",
+    "What is Sarah's phone number?",
+    "How much did I spend on food last month?",
+    "Show my recent transactions",
+    "Good morning JARVIS",
+]
+
+
+def install_fakes(stack: ExitStack, profile: Dict = None, seed: int = 0) -> Dict[str, fakes.LatencyModel]:
+    """Patch every upstream client used by the agents; undone when stack closes"""
+    profile = dict(DEFAULT_PROFILE, **(profile or {}))
+    latencies = {name: fakes.LatencyModel.from_profile(name, profile, seed) for name in profile}
+    workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="jarvis-bench-"))
+
+    chat = fakes.chat_model_factory(latencies["llm"])
+    for module in ("assistant_agent", "calendar_agent", "contact_agent", "email_agent",
+                   "expense_agent", "jarvis_personality"):
+        stack.enter_context(mock.patch(f"src.agents.{module}.ChatGoogleGenerativeAI", chat))
+
+    embeddings = fakes.FakeEmbeddings(latencies["embeddings"])
+    index = fakes.FakePineconeIndex(latencies["pinecone"])
+    calendar = fakes.FakeCalendarService(latencies["calendar"])
+    patches = {
+        "src.agents.expense_agent.GoogleGenerativeAIEmbeddings": lambda *a, **k: embeddings,
+        "src.agents.expense_agent.Pinecone": fakes.FakePinecone(index),
+        "src.agents.expense_agent.SheetsClient":
+            fakes.sheets_factory(fakes.FakeSheetsClient(latencies["sheets"], seed=seed)),
+        "src.agents.contact_agent.Table": fakes.airtable_factory(fakes.FakeAirtableTable(latencies["airtable"])),
+        "src.agents.calendar_agent.Credentials": mock.MagicMock(),
+        "src.agents.calendar_agent.build": lambda *a, **k: calendar,
+        "src.utils.smtp_outbox.SMTPConnectionPool.smtp_factory": fakes.FakeSMTP,
+        "src.utils.text_to_speech.requests": fakes.FakeRequests(latencies["tts"]),
+        "src.utils.voice_handler.AudioSegment": fakes.FakeAudioSegment,
+        "src.utils.voice_handler.sr.Recognizer.recognize_google":
+            staticmethod(fakes.fake_recognizer(latencies["stt"])),
+    }
+    for target, replacement in patches.items():
+        stack.enter_context(mock.patch(target, replacement))
+    fakes.FakeSMTP.latency = latencies["smtp"]
+    fakes.FakeAudioSegment.latency = latencies["audio_decode"]
+
+    config = {
+        "TELEGRAM_BOT_TOKEN": "123456:BENCHMARK",
+        "VECTOR_BACKEND": "pinecone",
+        "TRANSACTION_DB_PATH": os.path.join(workdir, "transactions.db"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.db"),
+        "LOCAL_VECTOR_PATH": os.path.join(workdir, "vectors"),
+        "SLOW_REQUEST_SECONDS": float("inf"),
+    }
+    for name, value in config.items():
+        stack.enter_context(mock.patch.object(Config, name, value))
+    return latencies
+
+
+# -- Telegram update stand-ins -------------------------------------------------------
+
+class FakeVoiceFile:
+    def __init__(self, transcript: str):
+        self.transcript = transcript
+
+    async def download_to_drive(self, path):
+        with open(path, "wb") as f:
+            f.write(self.transcript.encode("utf-8"))
+
+
+class FakeVoice:
+    def __init__(self, transcript: str):
+        self.transcript = transcript
+
+    async def get_file(self):
+        return FakeVoiceFile(self.transcript)
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, chat_id: int, text: str = None, voice: str = None):
+        self.message_id = message_id
+        self.chat_id = chat_id
+        self.text = text
+        self.voice = FakeVoice(voice) if voice is not None else None
+        self.replies: List = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(("text", len(text)))
+
+    async def reply_voice(self, voice=None, **kwargs):
+        data = voice.read() if hasattr(voice, "read") else voice
+        if hasattr(voice, "close"):
+            voice.close()
+        self.replies.append(("voice", len(data or b"")))
+
+
+class FakeUpdate:
+    def __init__(self, message: FakeMessage):
+        self.message = message
+        self.effective_chat = type("Chat", (), {"id": message.chat_id})()
+
+
+def load_updates(path: str) -> List[Dict]:
+    """Read recorded updates: one JSON object per line with text or voice, and chat_id"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def synthetic_updates(count: int, voice_ratio: float = 0.3, chats: int = 10, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    updates = []
+    for _ in range(count):
+        query = rng.choice(SYNTHETIC_QUERIES)
+        kind = "voice" if rng.random() < voice_ratio else "text"
+        updates.append({kind: query, "chat_id": rng.randrange(chats)})
+    return updates
+
+
+# -- replay ----------------------------------------------------------------------
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percentile / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+        "p50_ms": _percentile(values, 50) * 1000,
+        "p95_ms": _percentile(values, 95) * 1000,
+        "p99_ms": _percentile(values, 99) * 1000,
+    }
+
+async def replay(handler, updates: List[Dict], rate: float) -> Dict:
+    """Feed updates into the handler at `rate` per second and measure the results
+
+    Updates are not serialised the way Application.process_update would
+    run them; see the module docstring.
+    """
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    voice_bytes: List[int] = []
+    errors = 0
+
+    def on_trace(trace, total):
+        latencies.append(total)
+        for span in trace.spans:
+            stages.setdefault(span["name"], []).append(span["duration"])
+
+    async def dispatch(index: int, update: Dict):
+        nonlocal errors
+        message = FakeMessage(index + 1, update.get("chat_id", 0), text=update.get("text"),
+                              voice=update.get("voice"))
+        try:
+            if message.voice is not None:
+                await handler.handle_voice(FakeUpdate(message), None)
+            else:
+                await handler.handle_text(FakeUpdate(message), None)
+        except Exception:
+            errors += 1
+        voice_bytes.extend(size for kind, size in message.replies if kind == "voice")
+
+    telemetry.add_trace_listener(on_trace)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        tasks = []
+        for index, update in enumerate(updates):
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(dispatch(index, update)))
+        await asyncio.gather(*tasks)
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        telemetry.remove_trace_listener(on_trace)
+
+    return {
+        "requests": len(updates),
+        "target_rate": rate,
+        "throughput_rps": len(updates) / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "peak_memory_mb": peak / (1024 * 1024),
+        "voice_reply_bytes": statistics.fmean(voice_bytes) if voice_bytes else 0.0,
+        "end_to_end": summarize(latencies),
+        "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+    }
+
+def compare(report: Dict, baseline: Dict, tolerance: float = 0.1, min_delta_ms: float = 5.0) -> List[str]:
+    """List regressions of report against baseline beyond the given fraction
+
+    Latencies must also grow by more than min_delta_ms, so millisecond-scale
+    stages don't fail on scheduler noise.
+    """
+    def slower(current: float, previous: float) -> bool:
+        return bool(previous) and current > max(previous * (1 + tolerance), previous + min_delta_ms)
+
+    regressions = []
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        current, previous = report["end_to_end"][key], baseline["end_to_end"][key]
+        if slower(current, previous):
+            regressions.append(f"end-to-end {key}: {current:.1f} > {previous:.1f} (+{tolerance:.0%} allowed)")
+    for stage, stats in baseline.get("stages", {}).items():
+        current = report["stages"].get(stage)
+        if current and slower(current["p95_ms"], stats["p95_ms"]):
+            regressions.append(f"{stage} p95_ms: {current['p95_ms']:.1f} > {stats['p95_ms']:.1f}")
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput: {report['throughput_rps']:.2f} < {baseline['throughput_rps']:.2f} rps"
+        )
+    if baseline["peak_memory_mb"] and report["peak_memory_mb"] > baseline["peak_memory_mb"] * (1 + tolerance):
+        regressions.append(
+            f"peak memory: {report['peak_memory_mb']:.1f} > {baseline['peak_memory_mb']:.1f} MB"
+        )
+    if report["errors"] > baseline.get("errors", 0):
+        regressions.append(f"errors: {report['errors']} > {baseline.get('errors', 0)}")
+    return regressions
@@ -0,0 +1,81 @@
+"""Run the offline benchmark
+
+    python -m benchmarks.run --requests 50 --rate 2
+    python -m benchmarks.run --baseline benchmarks/baseline.json          # fail on regression
+    python -m benchmarks.run --baseline benchmarks/baseline.json --update-baseline
+
+benchmarks/baseline.json is the committed reference for the default
+arguments; the run exits with status 1 when any metric regresses beyond
+--tolerance. Updates are replayed straight into the handler, concurrently,
+without PTB's process_update (see benchmarks.harness).
+"""
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import ExitStack
+from unittest import mock
+
+from benchmarks import harness
+from src.config import Config
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline JARVIS load test")
+    parser.add_argument("--requests", type=int, default=50, help="Number of synthetic updates")
+    parser.add_argument("--rate", type=float, default=2.0, help="Target updates per second")
+    parser.add_argument("--voice-ratio", type=float, default=0.3, help="Share of voice updates")
+    parser.add_argument("--updates", help="JSONL file of recorded updates to replay instead")
+    parser.add_argument("--profile", help="JSON file overriding upstream latency/error settings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speculative", action="store_true", help="Enable speculative routing")
+    parser.add_argument("--baseline", help="Baseline report to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed regression fraction")
+    parser.add_argument("--output", help="Write the report JSON here")
+    args = parser.parse_args(argv)
+
+    profile = {}
+    if args.profile:
+        with open(args.profile) as f:
+            profile = json.load(f)
+
+    if args.updates:
+        updates = harness.load_updates(args.updates)
+    else:
+        updates = harness.synthetic_updates(args.requests, args.voice_ratio, seed=args.seed)
+
+    with ExitStack() as stack:
+        harness.install_fakes(stack, profile, seed=args.seed)
+        if args.speculative:
+            stack.enter_context(mock.patch.object(Config, "SPECULATIVE_ROUTING", True))
+        from src.utils.telegram_handler import TelegramHandler
+        handler = TelegramHandler()
+        report = asyncio.run(harness.replay(handler, updates, args.rate))
+        if handler.assistant.speculator is not None:
+            report["speculation"] = handler.assistant.speculator.stats()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = harness.compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:", file=sys.stderr)
+            for regression in regressions:
+                print(f"- {regression}", file=sys.stderr)
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 
-from src.utils.telegram_handler import TelegramHandler
+from src.utils.telemetry import configure_slow_log, start_metrics_server
 from src.config import Config
 
 def main():
@@ -10,7 +10,22 @@ def main():
     print("Initializing JARVIS Assistant...")
     print(f"Using Anthropic model: {Config.ANTHROPIC_MODEL}")
     
+    if Config.SLOW_REQUEST_LOG:
+        configure_slow_log(Config.SLOW_REQUEST_LOG)
+    
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_PORT)
+        print(f"Metrics available at http://127.0.0.1:{Config.METRICS_PORT}/metrics")
+    
+    if Config.WORKERS > 1:
+        # Updates are sharded by chat across worker processes; workers serve
+        # their own metrics on METRICS_PORT + 1 + index
+        from src.utils.supervisor import Supervisor
+        Supervisor(Config.WORKERS).run()
+        return
+    
     # Initialize and run Telegram bot
+    from src.utils.telegram_handler import TelegramHandler
     telegram_handler = TelegramHandler()
     telegram_handler.run()
 
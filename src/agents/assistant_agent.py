@@ -1,11 +1,19 @@
 
-from typing import TypedDict, Annotated, Sequence
+from typing import TypedDict, Annotated, List, Sequence
+import asyncio
 import operator
+import re
+import threading
+import time
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from src.config import Config
+from src.utils.rate_limit import limiters
+from src.utils.request_context import request_scope
+from src.utils.speculation import Speculator
+from src.utils.telemetry import record_llm_usage, span, traced
 
 from src.agents.calendar_agent import CalendarAgent
 from src.agents.email_agent import EmailAgent
@@ -24,15 +32,24 @@ class AssistantAgent:
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-pro",
             google_api_key=Config.GOOGLE_API_KEY,
-            temperature=0
+            temperature=0,
+            **limiters.chat_model_kwargs("gemini")
         )
         
         # Initialize child agents
         self.calendar_agent = CalendarAgent()
-        self.email_agent = EmailAgent()
         self.contact_agent = ContactAgent()
+        self.email_agent = EmailAgent(contact_agent=self.contact_agent)
         self.expense_agent = ExpenseAgent()
         
+        # Optional: prefetch for the likely agent while the router decides
+        self.speculator = Speculator({
+            "calendar": self._prefetch_calendar,
+            "contact": self._prefetch_contacts,
+            "email": self._prefetch_recipients,
+            "expense": self._prefetch_expenses,
+        }) if Config.SPECULATIVE_ROUTING else None
+        
         self.system_prompt = """You are a Personal Assistant AI. Your role is to efficiently delegate user queries to appropriate tools/agents.
 
 Available agents:
@@ -94,9 +111,11 @@ Always think step-by-step about what information you need and which agents to ca
         
         return workflow.compile()
     
-    def _router_node(self, state: AgentState) -> AgentState:
+    @traced("graph.router")
+    async def _router_node(self, state: AgentState) -> AgentState:
         """Route to appropriate agent based on query"""
         last_message = state["messages"][-1].content
+        speculation = self.speculator.start(last_message) if self.speculator else None
         
         # Use LLM to determine routing
         routing_prompt = ChatPromptTemplate.from_messages([
@@ -113,9 +132,13 @@ Respond with ONLY the agent name, nothing else."""),
             ("human", "{query}")
         ])
         
-        response = self.llm.invoke(routing_prompt.format_messages(query=last_message))
+        response = await self.llm.ainvoke(routing_prompt.format_messages(query=last_message))
+        record_llm_usage("graph.router", response)
         next_agent = response.content.strip().lower()
         
+        if speculation is not None:
+            await asyncio.to_thread(speculation.resolve, next_agent)
+        
         state["next_agent"] = next_agent
         return state
     
@@ -123,49 +146,130 @@ Respond with ONLY the agent name, nothing else."""),
         """Determine next node based on routing decision"""
         return state.get("next_agent", "end")
     
-    def _calendar_node(self, state: AgentState) -> AgentState:
+    @traced("graph.calendar")
+    async def _calendar_node(self, state: AgentState) -> AgentState:
         """Execute calendar agent"""
         query = state["messages"][-1].content
-        result = self.calendar_agent.run(query)
+        result = await self.calendar_agent.arun(query)
         
         state["messages"].append(AIMessage(content=result, name="calendar_agent"))
         state["sender"] = "calendar_agent"
         return state
     
-    def _email_node(self, state: AgentState) -> AgentState:
+    @traced("graph.email")
+    async def _email_node(self, state: AgentState) -> AgentState:
         """Execute email agent - may need contact info first"""
         query = state["messages"][-1].content
+        email_input = query
         
         # Check if we need contact info
         if "send" in query.lower() and "@" not in query:
-            # Extract contact name and get email
+            # Extract contact names and resolve them in a single lookup
             # This is simplified - you'd want more robust name extraction
-            words = query.split()
-            for i, word in enumerate(words):
-                if word.lower() in ["to", "email"]:
-                    if i + 1 < len(words):
-                        contact_name = words[i + 1]
-                        contact_info = self.contact_agent.run(f"Get contact information for {contact_name}")
-                        state["messages"].append(AIMessage(content=contact_info, name="contact_agent"))
-        
-        result = self.email_agent.run(query)
+            contact_names = self._extract_recipient_names(query)
+            if contact_names:
+                try:
+                    with span("graph.email.resolve_recipients"):
+                        contacts = await asyncio.to_thread(self.contact_agent.resolve_contacts, contact_names)
+                    contact_info = "\n\n".join(
+                        ContactAgent.format_contact(contact) if contact
+                        else f"No contact found with name: {name}"
+                        for name, contact in contacts.items()
+                    )
+                except Exception as e:
+                    contact_info = f"Error retrieving contact: {str(e)}"
+                state["messages"].append(AIMessage(content=contact_info, name="contact_agent"))
+                # The email agent only sees its input, so hand it the addresses
+                email_input = f"{query}\n\nRecipient contact details:\n{contact_info}"
+        
+        result = await self.email_agent.arun(email_input)
         state["messages"].append(AIMessage(content=result, name="email_agent"))
         state["sender"] = "email_agent"
         return state
     
-    def _contact_node(self, state: AgentState) -> AgentState:
+    @staticmethod
+    def _extract_recipient_names(query: str) -> List[str]:
+        """Collect the names following "to"/"email", e.g. "email John, Sarah and Mike" """
+        triggers = ["to", "email"]
+        raw_words = query.split()
+        words = [word.strip(".,;:!?\"'") for word in raw_words]
+        names = []
+        i = 0
+        while i < len(words):
+            if words[i].lower() not in triggers:
+                i += 1
+                continue
+            j = i + 1
+            while j < len(words) and words[j].lower() in triggers:
+                j += 1
+            # Follow lists joined by commas or "and"
+            while j < len(words) and words[j]:
+                names.append(words[j])
+                if j + 2 < len(words) and words[j + 1].lower() in ["and", "&"]:
+                    j += 2
+                elif raw_words[j].endswith(",") and j + 1 < len(words):
+                    j += 1
+                else:
+                    break
+            i = j + 1
+        return list(dict.fromkeys(names))
+    
+    # Words that start questions or commands rather than name a contact
+    _NOT_NAMES = {
+        "what", "whats", "who", "where", "when", "how", "is", "are", "do", "does", "can", "could",
+        "would", "please", "find", "get", "show", "tell", "give", "look", "i", "my", "the", "jarvis",
+    }
+    
+    @classmethod
+    def _extract_contact_names(cls, query: str) -> List[str]:
+        """Capitalized words that could be contact names, e.g. "What is Sarah's number?" """
+        # Skip the first word, which is capitalized regardless
+        matches = re.finditer(r"\b([A-Z][a-zA-Z\-]+)(?:'s)?\b", query.strip())
+        names = [m.group(1) for m in matches if m.start() > 0 and m.group(1).lower() not in cls._NOT_NAMES]
+        return list(dict.fromkeys(names))
+    
+    # Speculative prefetches: read-only calls whose results land in the
+    # request memo or the agents' caches. Each checks `cancelled` right
+    # before going upstream, so a mispredicted prefetch stops early.
+    def _prefetch_calendar(self, query: str, cancelled: threading.Event):
+        if cancelled.is_set():
+            return None
+        return self.calendar_agent._get_events({})
+    
+    def _prefetch_contacts(self, query: str, cancelled: threading.Event):
+        names = self._extract_contact_names(query)
+        if not names or cancelled.is_set():
+            return None
+        return self.contact_agent.resolve_contacts(names)
+    
+    def _prefetch_recipients(self, query: str, cancelled: threading.Event):
+        names = self._extract_recipient_names(query)
+        if not names or cancelled.is_set():
+            return None
+        return self.contact_agent.resolve_contacts(names)
+    
+    def _prefetch_expenses(self, query: str, cancelled: threading.Event):
+        # Local only: the agent embeds its own rephrasing of the query, and
+        # keyword-only searches skip embedding altogether
+        if cancelled.is_set():
+            return None
+        return self.expense_agent._refresh_lexical_index()
+    
+    @traced("graph.contact")
+    async def _contact_node(self, state: AgentState) -> AgentState:
         """Execute contact agent"""
         query = state["messages"][-1].content
-        result = self.contact_agent.run(query)
+        result = await self.contact_agent.arun(query)
         
         state["messages"].append(AIMessage(content=result, name="contact_agent"))
         state["sender"] = "contact_agent"
         return state
     
-    def _expense_node(self, state: AgentState) -> AgentState:
+    @traced("graph.expense")
+    async def _expense_node(self, state: AgentState) -> AgentState:
         """Execute expense agent"""
         query = state["messages"][-1].content
-        result = self.expense_agent.run(query)
+        result = await self.expense_agent.arun(query)
         
         state["messages"].append(AIMessage(content=result, name="expense_agent"))
         state["sender"] = "expense_agent"
@@ -189,7 +293,24 @@ Respond with ONLY the agent name, nothing else."""),
         state["final_response"] = final_response
         return state
     
+    def close(self, timeout: float = 30.0):
+        """Finish the agents' background deliveries; call once on shutdown"""
+        deadline = time.monotonic() + timeout
+        self.contact_agent.close(timeout)
+        self.email_agent.close(max(0.0, deadline - time.monotonic()))
+    
     def run(self, query: str) -> str:
+        """Execute the assistant agent workflow from synchronous code"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.arun(query))
+        # Blocking here would stall the loop that is running this caller
+        raise RuntimeError(
+            "AssistantAgent.run() was called from a running event loop; use 'await agent.arun(query)' instead"
+        )
+    
+    async def arun(self, query: str) -> str:
         """Execute the assistant agent workflow"""
         initial_state = {
             "messages": [HumanMessage(content=query)],
@@ -198,5 +319,7 @@ Respond with ONLY the agent name, nothing else."""),
             "final_response": ""
         }
         
-        result = self.graph.invoke(initial_state)
+        # Idempotent tool results are shared by every agent for this request
+        with request_scope():
+            result = await self.graph.ainvoke(initial_state)
         return result["final_response"]
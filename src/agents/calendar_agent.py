@@ -1,17 +1,21 @@
 from typing import List
 from langchain.agents import create_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.tools import tool
 from googleapiclient.discovery import build
 from google.oauth2.service_account import Credentials
 from datetime import datetime
 from src.config import Config
+from src.utils.async_tools import ToolRunner
+from src.utils.rate_limit import limiters
+from src.utils.request_context import invalidates, memoize_in_request
+from src.utils.telemetry import record_llm_usage, span, traced
 
 class CalendarAgent:
     def __init__(self):
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-pro",
-            google_api_key=Config.GOOGLE_API_KEY
+            google_api_key=Config.GOOGLE_API_KEY,
+            **limiters.chat_model_kwargs("gemini")
         )
         
         # Initialize Google Calendar API
@@ -30,6 +34,9 @@ Tools available:
 
 Always provide clear confirmations and handle time zones appropriately."""
         
+        # Tool calls from one model turn run concurrently on a bounded per-agent pool
+        self.tool_runner = ToolRunner("calendar", max_workers=Config.AGENT_TOOL_CONCURRENCY)
+        
         self.agent = create_agent(
             model=self.llm,
             tools=self._create_tools(),
@@ -39,7 +46,7 @@ Always provide clear confirmations and handle time zones appropriately."""
     def _create_tools(self) -> List:
         """Create calendar-related tools"""
         
-        @tool
+        @self.tool_runner.tool
         def create_event(summary: str, start_time: str, end_time: str, description: str = "") -> str:
             """Create a calendar event.
             
@@ -51,7 +58,7 @@ Always provide clear confirmations and handle time zones appropriately."""
             """
             return self._create_event({"summary": summary, "start_time": start_time, "end_time": end_time, "description": description})
         
-        @tool
+        @self.tool_runner.tool
         def get_events(start_date: str = "", end_date: str = "") -> str:
             """Get calendar events.
             
@@ -61,7 +68,7 @@ Always provide clear confirmations and handle time zones appropriately."""
             """
             return self._get_events({"start_date": start_date, "end_date": end_date} if start_date or end_date else {})
         
-        @tool
+        @self.tool_runner.tool
         def delete_event(event_id: str) -> str:
             """Delete a calendar event.
             
@@ -72,6 +79,8 @@ Always provide clear confirmations and handle time zones appropriately."""
         
         return [create_event, get_events, delete_event]
     
+    @invalidates("calendar.get_events")
+    @traced("tool.create_event")
     def _create_event(self, input_data: str) -> str:
         """Create a calendar event"""
         try:
@@ -91,15 +100,21 @@ Always provide clear confirmations and handle time zones appropriately."""
                 },
             }
             
-            created_event = self.calendar_service.events().insert(
-                calendarId='primary',
-                body=event
-            ).execute()
+            with span("calendar.insert"):
+                created_event = limiters.call(
+                    "calendar",
+                    self.calendar_service.events().insert(
+                        calendarId='primary',
+                        body=event
+                    ).execute
+                )
             
             return f"Event created: {created_event['summary']} on {params['start_time']}"
         except Exception as e:
             return f"Error creating event: {str(e)}"
     
+    @memoize_in_request("calendar.get_events")
+    @traced("tool.get_events")
     def _get_events(self, input_data: str) -> str:
         """Get calendar events"""
         try:
@@ -112,14 +127,18 @@ Always provide clear confirmations and handle time zones appropriately."""
             time_min = params.get('start_date', datetime.utcnow().isoformat() + 'Z')
             time_max = params.get('end_date', (datetime.utcnow() + timedelta(days=7)).isoformat() + 'Z')
             
-            events_result = self.calendar_service.events().list(
-                calendarId='primary',
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=10,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+            with span("calendar.list"):
+                events_result = limiters.call(
+                    "calendar",
+                    self.calendar_service.events().list(
+                        calendarId='primary',
+                        timeMin=time_min,
+                        timeMax=time_max,
+                        maxResults=10,
+                        singleEvents=True,
+                        orderBy='startTime'
+                    ).execute
+                )
             
             events = events_result.get('items', [])
             
@@ -135,13 +154,19 @@ Always provide clear confirmations and handle time zones appropriately."""
         except Exception as e:
             return f"Error retrieving events: {str(e)}"
     
+    @invalidates("calendar.get_events")
+    @traced("tool.delete_event")
     def _delete_event(self, event_id: str) -> str:
         """Delete a calendar event"""
         try:
-            self.calendar_service.events().delete(
-                calendarId='primary',
-                eventId=event_id
-            ).execute()
+            with span("calendar.delete"):
+                limiters.call(
+                    "calendar",
+                    self.calendar_service.events().delete(
+                        calendarId='primary',
+                        eventId=event_id
+                    ).execute
+                )
             
             return f"Event deleted successfully"
         except Exception as e:
@@ -149,7 +174,24 @@ Always provide clear confirmations and handle time zones appropriately."""
     
     def run(self, query: str) -> str:
         """Execute calendar agent"""
-        result = self.agent.invoke({"messages": [{"role": "user", "content": query}]})
+        with span("agent.calendar"):
+            result = self.agent.invoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.calendar", *result.get("messages", []))
+        return self._final_content(result)
+    
+    async def arun(self, query: str) -> str:
+        """Execute calendar agent without blocking the event loop"""
+        with span("agent.calendar"):
+            result = await self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.calendar", *result.get("messages", []))
+        return self._final_content(result)
+    
+    @staticmethod
+    def _final_content(result) -> str:
         # Extract the last message content
         messages = result.get("messages", [])
         if messages:
@@ -1,16 +1,22 @@
 
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from langchain.agents import create_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.tools import tool
 from pyairtable import Table
 from src.config import Config
+from src.utils.request_context import invalidates, memoize_in_request
+from src.utils.telemetry import record_llm_usage, span, traced
+from src.utils.ttl_cache import SharedTTLCache, TTLCache
+from src.utils.airtable_writer import AirtableBatchWriter
+from src.utils.async_tools import ToolRunner
+from src.utils.rate_limit import limiters
 
 class ContactAgent:
     def __init__(self):
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-pro",
-            google_api_key=Config.GOOGLE_API_KEY
+            google_api_key=Config.GOOGLE_API_KEY,
+            **limiters.chat_model_kwargs("gemini")
         )
         
         self.table = Table(
@@ -19,15 +25,42 @@ class ContactAgent:
             Config.AIRTABLE_TABLE_NAME
         )
         
+        # Creates are queued and sent to Airtable in batches of up to 10
+        self.writer = AirtableBatchWriter(
+            self.table,
+            flush_interval=Config.AIRTABLE_FLUSH_INTERVAL,
+            rate_limiter=limiters.get("airtable"),
+            max_in_flight=Config.AIRTABLE_CONCURRENCY
+        )
+        
+        # name (lowercased) -> contact record, or None for a known miss.
+        # Worker processes share one SQLite-backed cache so a lookup or write in one is seen by all.
+        if Config.WORKERS > 1:
+            self.contact_cache = SharedTTLCache(
+                Config.SHARED_CACHE_PATH,
+                namespace="contacts",
+                maxsize=Config.CONTACT_CACHE_SIZE,
+                ttl=Config.CONTACT_CACHE_TTL
+            )
+        else:
+            self.contact_cache = TTLCache(
+                maxsize=Config.CONTACT_CACHE_SIZE,
+                ttl=Config.CONTACT_CACHE_TTL
+            )
+        
         self.system_prompt = """You are a Contact Database Agent. Your role is to retrieve and manage contact information.
 
 Tools available:
 - get_contact: Retrieve contact information by name
+- get_contacts: Retrieve contact information for several names in one lookup
 - search_contacts: Search for contacts
 - add_contact: Add a new contact
 
 Always provide accurate contact information."""
         
+        # Tool calls from one model turn run concurrently on a bounded per-agent pool
+        self.tool_runner = ToolRunner("contact", max_workers=Config.AGENT_TOOL_CONCURRENCY)
+        
         self.agent = create_agent(
             model=self.llm,
             tools=self._create_tools(),
@@ -37,7 +70,7 @@ Always provide accurate contact information."""
     def _create_tools(self) -> List:
         """Create contact-related tools"""
         
-        @tool
+        @self.tool_runner.tool
         def get_contact(name: str) -> str:
             """Get contact information by name.
             
@@ -46,7 +79,16 @@ Always provide accurate contact information."""
             """
             return self._get_contact(name)
         
-        @tool
+        @self.tool_runner.tool
+        def get_contacts(names: List[str]) -> str:
+            """Get contact information for several people at once.
+            
+            Args:
+                names: The names of the contacts to retrieve
+            """
+            return self._get_contacts(names)
+        
+        @self.tool_runner.tool
         def search_contacts(query: str) -> str:
             """Search for contacts.
             
@@ -55,7 +97,7 @@ Always provide accurate contact information."""
             """
             return self._search_contacts(query)
         
-        @tool
+        @self.tool_runner.tool
         def add_contact(name: str, email: str, phone: str = "") -> str:
             """Add a new contact.
             
@@ -66,30 +108,119 @@ Always provide accurate contact information."""
             """
             return self._add_contact({"name": name, "email": email, "phone": phone})
         
-        return [get_contact, search_contacts, add_contact]
+        return [get_contact, get_contacts, search_contacts, add_contact]
     
+    @staticmethod
+    def _normalize_name(name: str) -> str:
+        return " ".join(name.split()).lower()
+    
+    @staticmethod
+    def _to_record(record: dict) -> Dict:
+        """Convert an Airtable record into a structured contact"""
+        fields = record.get('fields', {})
+        return {
+            'id': record.get('id'),
+            'name': fields.get('Name', ''),
+            'email': fields.get('Email', ''),
+            'phone': fields.get('Phone', ''),
+        }
+    
+    @staticmethod
+    def format_contact(contact: Dict) -> str:
+        """Format a structured contact for display"""
+        contact_info = f"Name: {contact.get('name') or 'N/A'}\n"
+        contact_info += f"Email: {contact.get('email') or 'N/A'}\n"
+        contact_info += f"Phone: {contact.get('phone') or 'N/A'}"
+        return contact_info
+    
+    def resolve_contacts(self, names: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Resolve names to contact records, fetching all cache misses in one request
+        
+        Returns a mapping of each requested name to its record, or None if no
+        contact exists with that name.
+        """
+        names = [name for name in names if name and name.strip()]
+        keys = {name: self._normalize_name(name) for name in names}
+        
+        hits, misses = self.contact_cache.get_many(dict.fromkeys(keys.values()))
+        if misses:
+            clauses = []
+            for key in misses:
+                escaped = key.replace("\\", "\\\\").replace("'", "\\'")
+                clauses.append(f"LOWER({{Name}}) = '{escaped}'")
+            formula = clauses[0] if len(clauses) == 1 else f"OR({', '.join(clauses)})"
+            
+            fetched = {}
+            with span("airtable.query"):
+                records = limiters.call("airtable", self.table.all, formula=formula)
+            for record in records:
+                contact = self._to_record(record)
+                fetched.setdefault(self._normalize_name(contact['name']), contact)
+            
+            for key in misses:
+                # Negative results are cached too so unknown names don't re-query
+                hits[key] = fetched.get(key)
+                self.contact_cache.set(key, hits[key])
+        
+        return {name: hits.get(key) for name, key in keys.items()}
+    
+    def resolve_group(self, group: str) -> List[Dict]:
+        """Get all contacts whose Group field lists the given group name
+        
+        Group is compared as whole comma-separated values, so "team" does not
+        match "steam" or "team-leads".
+        """
+        key = ('group', self._normalize_name(group))
+        contacts = self.contact_cache.get(key)
+        if contacts is None:
+            escaped = key[1].replace("\\", "\\\\").replace("'", "\\'")
+            groups = "SUBSTITUTE(SUBSTITUTE(LOWER({Group} & ''), ', ', ','), ' ,', ',')"
+            formula = f"FIND(',{escaped},', ',' & {groups} & ',')"
+            with span("airtable.query"):
+                records = limiters.call("airtable", self.table.all, formula=formula)
+            contacts = [self._to_record(record) for record in records]
+            self.contact_cache.set(key, contacts)
+        return contacts
+    
+    @memoize_in_request("contact.get_contact")
+    @traced("tool.get_contact")
     def _get_contact(self, name: str) -> str:
         """Get contact by name"""
         try:
-            formula = f"{{Name}} = '{name}'"
-            records = self.table.all(formula=formula)
+            contact = self.resolve_contacts([name]).get(name)
             
-            if not records:
+            if not contact:
                 return f"No contact found with name: {name}"
             
-            record = records[0]['fields']
-            contact_info = f"Name: {record.get('Name', 'N/A')}\n"
-            contact_info += f"Email: {record.get('Email', 'N/A')}\n"
-            contact_info += f"Phone: {record.get('Phone', 'N/A')}"
-            
-            return contact_info
+            return self.format_contact(contact)
         except Exception as e:
             return f"Error retrieving contact: {str(e)}"
     
+    @memoize_in_request("contact.get_contacts")
+    @traced("tool.get_contacts")
+    def _get_contacts(self, names: List[str]) -> str:
+        """Get several contacts by name"""
+        try:
+            contacts = self.resolve_contacts(names)
+            
+            results = []
+            for name, contact in contacts.items():
+                if contact:
+                    results.append(self.format_contact(contact))
+                else:
+                    results.append(f"No contact found with name: {name}")
+            
+            return "\n\n".join(results) if results else "No names given"
+        except Exception as e:
+            return f"Error retrieving contacts: {str(e)}"
+    
+    @memoize_in_request("contact.search_contacts")
+    @traced("tool.search_contacts")
     def _search_contacts(self, query: str) -> str:
         """Search contacts"""
         try:
-            all_records = self.table.all()
+            with span("airtable.query"):
+                all_records = limiters.call("airtable", self.table.all)
             matches = []
             
             for record in all_records:
@@ -107,25 +238,71 @@ Always provide accurate contact information."""
         except Exception as e:
             return f"Error searching contacts: {str(e)}"
     
+    @invalidates("contact.get_contact", "contact.get_contacts", "contact.search_contacts")
+    @traced("tool.add_contact")
     def _add_contact(self, input_data: str) -> str:
         """Add new contact"""
         try:
             import json
             params = json.loads(input_data) if isinstance(input_data, str) else input_data
             
-            self.table.create({
-                'Name': params['name'],
-                'Email': params['email'],
-                'Phone': params.get('phone', '')
-            })
+            record_id = self.import_contacts([params])[0].result(timeout=60)
             
-            return f"Contact added: {params['name']}"
+            return f"Contact added: {params['name']} ({record_id})"
         except Exception as e:
             return f"Error adding contact: {str(e)}"
     
+    def _invalidate_contact(self, key: str):
+        """Drop a cached name and any cached group listings"""
+        self.contact_cache.invalidate(key)
+        self.contact_cache.invalidate_where(lambda k: isinstance(k, tuple) and k[0] == 'group')
+    
+    @invalidates("contact.get_contact", "contact.get_contacts", "contact.search_contacts")
+    def import_contacts(self, contacts: List[Dict]) -> List:
+        """Queue contacts for creation
+        
+        Returns one future per contact that resolves to the Airtable record ID.
+        """
+        futures = self.writer.submit_many([
+            {
+                'Name': contact['name'],
+                'Email': contact['email'],
+                'Phone': contact.get('phone', '')
+            }
+            for contact in contacts
+        ])
+        for contact, future in zip(contacts, futures):
+            key = self._normalize_name(contact['name'])
+            self._invalidate_contact(key)
+            # Invalidate again once written, in case a lookup raced the create
+            future.add_done_callback(lambda _, key=key: self._invalidate_contact(key))
+        return futures
+    
+    def close(self, timeout: float = 30.0):
+        """Send queued creates to Airtable and stop the writer"""
+        self.writer.close(timeout)
+    
     def run(self, query: str) -> str:
         """Execute contact agent"""
-        result = self.agent.invoke({"messages": [{"role": "user", "content": query}]})
+        with span("agent.contact"):
+            result = self.agent.invoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.contact", *result.get("messages", []))
+        return self._final_content(result)
+    
+    async def arun(self, query: str) -> str:
+        """Execute contact agent without blocking the event loop"""
+        with span("agent.contact"):
+            result = await self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.contact", *result.get("messages", []))
+        return self._final_content(result)
+    
+    @staticmethod
+    def _final_content(result) -> str:
+        # Extract the last message content
         messages = result.get("messages", [])
         if messages:
             last_message = messages[-1]
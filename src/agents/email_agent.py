@@ -1,27 +1,64 @@
-from typing import List
+import re
+from typing import Dict, List, Optional
 from langchain.agents import create_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.tools import tool
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from src.config import Config
+from src.utils.async_tools import ToolRunner
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import record_llm_usage, span, traced
+from src.utils.smtp_outbox import SMTPConnectionPool, Outbox
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+def _fill(template: str, values: Dict[str, str]) -> str:
+    """Replace known {name} placeholders; any other braces are left as written"""
+    return _PLACEHOLDER.sub(
+        lambda match: str(values[match.group(1)]) if match.group(1) in values else match.group(0),
+        template
+    )
 
 class EmailAgent:
-    def __init__(self):
+    def __init__(self, contact_agent=None):
+        # Used to resolve contact names and groups for bulk sends
+        self.contact_agent = contact_agent
+        
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-pro",
-            google_api_key=Config.GOOGLE_API_KEY
+            google_api_key=Config.GOOGLE_API_KEY,
+            **limiters.chat_model_kwargs("gemini")
+        )
+        
+        # Authenticated SMTP sessions are reused across emails; delivery
+        # happens on the outbox's worker threads
+        self.smtp_pool = SMTPConnectionPool(
+            Config.SMTP_SERVER,
+            Config.SMTP_PORT,
+            username=Config.EMAIL_ADDRESS,
+            password=Config.EMAIL_PASSWORD,
+            use_tls=Config.SMTP_USE_TLS,
+            size=Config.SMTP_POOL_SIZE,
+            idle_timeout=Config.SMTP_IDLE_TIMEOUT
         )
+        self.outbox = Outbox(self.smtp_pool, max_attempts=Config.SMTP_MAX_ATTEMPTS)
         
         self.system_prompt = """You are an Email Management Agent. Your role is to send, read, and manage emails for the user.
 
 Tools available:
 - send_email: Send an email to specified recipients
 - draft_email: Draft an email without sending
+- send_bulk: Send a templated email to a list of recipients or a contact group in one go
+- get_email_status: Check the delivery status of a sent email by its message ID
+
+Use send_bulk rather than repeated send_email calls when the same message goes to several people.
+Templates may use {name}, {first_name} and {email} placeholders plus any per-recipient fields.
 
 Always compose professional, well-formatted emails."""
         
+        # Tool calls from one model turn run concurrently on a bounded per-agent pool
+        self.tool_runner = ToolRunner("email", max_workers=Config.AGENT_TOOL_CONCURRENCY)
+        
         self.agent = create_agent(
             model=self.llm,
             tools=self._create_tools(),
@@ -31,7 +68,7 @@ Always compose professional, well-formatted emails."""
     def _create_tools(self) -> List:
         """Create email-related tools"""
         
-        @tool
+        @self.tool_runner.tool
         def send_email(to: str, subject: str, body: str) -> str:
             """Send an email.
             
@@ -42,7 +79,7 @@ Always compose professional, well-formatted emails."""
             """
             return self._send_email({"to": to, "subject": subject, "body": body})
         
-        @tool
+        @self.tool_runner.tool
         def draft_email(to: str, subject: str, body: str) -> str:
             """Draft an email without sending.
             
@@ -53,8 +90,36 @@ Always compose professional, well-formatted emails."""
             """
             return self._draft_email({"to": to, "subject": subject, "body": body})
         
-        return [send_email, draft_email]
+        @self.tool_runner.tool
+        def get_email_status(message_id: str) -> str:
+            """Check whether a queued email has been delivered.
+            
+            Args:
+                message_id: The message ID returned by send_email
+            """
+            return self._get_email_status(message_id)
+        
+        @self.tool_runner.tool
+        def send_bulk(subject: str, body: str, recipients: Optional[List[str]] = None,
+                      group: str = "", fields: Optional[List[Dict[str, str]]] = None) -> str:
+            """Send a templated email to many recipients over one connection.
+            
+            Args:
+                subject: Subject template, e.g. "Notes for {first_name}"
+                body: Body template with {placeholders}
+                recipients: Email addresses or contact names
+                group: Optional contact group to send to, e.g. "team"
+                fields: Optional extra template fields, one entry per value:
+                    {"recipient": name or email, "key": "placeholder", "value": "text"}
+            """
+            return self._send_bulk({
+                "subject": subject, "body": body, "recipients": recipients or [],
+                "group": group, "fields": fields or []
+            })
+        
+        return [send_email, draft_email, send_bulk, get_email_status]
     
+    @traced("tool.send_email")
     def _send_email(self, input_data: str) -> str:
         """Send an email"""
         try:
@@ -69,16 +134,125 @@ Always compose professional, well-formatted emails."""
             
             msg.attach(MIMEText(params['body'], 'plain'))
             
-            # Send email via SMTP
-            with smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT) as server:
-                server.starttls()
-                server.login(Config.EMAIL_ADDRESS, Config.EMAIL_PASSWORD)
-                server.send_message(msg)
+            # Queue for delivery; the outbox sends it in the background
+            message_id = self.outbox.enqueue(msg)
             
-            return f"Email sent successfully to {params['to']}"
+            return f"Email queued for delivery to {params['to']} (message ID: {message_id})"
         except Exception as e:
             return f"Error sending email: {str(e)}"
     
+    def close(self, timeout: float = 30.0):
+        """Deliver queued emails, then close the SMTP connections"""
+        self.outbox.close(timeout)
+        self.smtp_pool.close()
+    
+    def _resolve_recipients(self, recipients: List[str], group: str) -> tuple:
+        """Turn addresses, contact names and a group into (contacts, unresolved names)"""
+        contacts, names, unresolved = [], [], []
+        for recipient in recipients:
+            if "@" in recipient:
+                contacts.append({'name': '', 'email': recipient.strip()})
+            else:
+                names.append(recipient)
+        
+        if names or group:
+            if self.contact_agent is None:
+                return contacts, names + ([group] if group else [])
+            if names:
+                for name, contact in self.contact_agent.resolve_contacts(names).items():
+                    if contact and contact.get('email'):
+                        contacts.append(contact)
+                    else:
+                        unresolved.append(name)
+            if group:
+                members = self.contact_agent.resolve_group(group)
+                contacts.extend(contact for contact in members if contact.get('email'))
+                if not members:
+                    unresolved.append(f"group '{group}'")
+        
+        # One message per address, keeping the first contact seen for it
+        unique = {}
+        for contact in contacts:
+            unique.setdefault(contact['email'].lower(), contact)
+        return list(unique.values()), unresolved
+    
+    def _render_message(self, contact: Dict, subject: str, body: str, extra: Dict) -> MIMEMultipart:
+        """Render the subject/body templates for one recipient"""
+        name = contact.get('name') or ''
+        values = {
+            'name': name or contact['email'],
+            'first_name': name.split()[0] if name else contact['email'],
+            'email': contact['email'],
+        }
+        values.update(extra.get(contact['email'], {}))
+        if name:
+            values.update(extra.get(name, {}))
+        
+        msg = MIMEMultipart()
+        msg['From'] = Config.EMAIL_ADDRESS
+        msg['To'] = contact['email']
+        msg['Subject'] = _fill(subject, values)
+        msg.attach(MIMEText(_fill(body, values), 'plain'))
+        return msg
+    
+    @staticmethod
+    def _group_fields(fields: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """Turn {recipient, key, value} entries into template values per recipient"""
+        extra: Dict[str, Dict[str, str]] = {}
+        for field in fields:
+            extra.setdefault(field['recipient'], {})[field['key']] = field['value']
+        return extra
+    
+    @traced("tool.send_bulk")
+    def _send_bulk(self, input_data: str) -> str:
+        """Render templated emails locally and send them over one SMTP session"""
+        try:
+            import json
+            params = json.loads(input_data) if isinstance(input_data, str) else input_data
+            
+            contacts, unresolved = self._resolve_recipients(
+                params.get('recipients', []), params.get('group', '')
+            )
+            if not contacts:
+                return "No recipients to send to" + (
+                    f" (could not resolve: {', '.join(unresolved)})" if unresolved else ""
+                )
+            
+            extra = self._group_fields(params.get('fields') or [])
+            messages, failed = [], []
+            for contact in contacts:
+                try:
+                    messages.append(self._render_message(contact, params['subject'], params['body'], extra))
+                except Exception as e:
+                    # One bad recipient should not stop the rest of the batch
+                    failed.append({'to': contact['email'], 'status': 'failed',
+                                   'error': f"could not render message: {e}"})
+            results = (self.outbox.send_batch(messages) if messages else []) + failed
+            
+            sent = sum(1 for result in results if result['status'] == 'sent')
+            lines = [f"Bulk email: {sent}/{len(results)} sent"]
+            for result in results:
+                line = f"- {result['to']}: {result['status']}"
+                if result['error']:
+                    line += f" ({result['error']})"
+                lines.append(line)
+            for name in unresolved:
+                lines.append(f"- {name}: not found in contacts")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error sending bulk email: {str(e)}"
+    
+    def _get_email_status(self, message_id: str) -> str:
+        """Report delivery status of a queued email"""
+        status = self.outbox.status(message_id.strip())
+        if status is None:
+            return f"No email found with message ID: {message_id}"
+        
+        result = f"Email to {status['to']}: {status['status']} (attempts: {status['attempts']})"
+        if status['error']:
+            result += f" - last error: {status['error']}"
+        return result
+    
     def _draft_email(self, input_data: str) -> str:
         """Draft an email"""
         try:
@@ -98,7 +272,25 @@ Subject: {params['subject']}
     
     def run(self, query: str) -> str:
         """Execute email agent"""
-        result = self.agent.invoke({"messages": [{"role": "user", "content": query}]})
+        with span("agent.email"):
+            result = self.agent.invoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.email", *result.get("messages", []))
+        return self._final_content(result)
+    
+    async def arun(self, query: str) -> str:
+        """Execute email agent without blocking the event loop"""
+        with span("agent.email"):
+            result = await self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.email", *result.get("messages", []))
+        return self._final_content(result)
+    
+    @staticmethod
+    def _final_content(result) -> str:
+        # Extract the last message content
         messages = result.get("messages", [])
         if messages:
             last_message = messages[-1]
@@ -1,28 +1,70 @@
-
-from typing import List
+import threading
+import time
+from typing import List, Optional
 from langchain.agents import create_agent
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_core.tools import tool
 from pinecone import Pinecone
 from src.config import Config
-import gspread
-from google.oauth2.service_account import Credentials
+from src.utils.async_tools import ToolRunner
+from src.utils.rate_limit import limiters
+from src.utils.request_context import memoize_in_request
+from src.utils.telemetry import record_llm_usage, span, traced
+from src.utils.transaction_store import SheetsClient, TransactionStore, parse_date
+from src.utils.spending_analytics import SpendingAnalytics, parse_time_period
+from src.utils.embedding_cache import CachedEmbeddings
+from src.utils.expense_ingestion import ExpenseIngestionPipeline, IngestionStats, content_hash
+from src.utils.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.utils.vector_store import LocalVectorStore, PineconeVectorStore, filter_metadata
 
 class ExpenseAgent:
     def __init__(self):
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-pro",
-            google_api_key=Config.GOOGLE_API_KEY
+            google_api_key=Config.GOOGLE_API_KEY,
+            **limiters.chat_model_kwargs("gemini")
         )
         
-        # Initialize Pinecone for vector search
-        self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-        self.index = self.pc.Index(Config.PINECONE_INDEX_NAME)
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=Config.GOOGLE_API_KEY
+        # Initialize the vector index (Pinecone, or a local offline index)
+        if Config.VECTOR_BACKEND == "local":
+            self.vector_store = LocalVectorStore(
+                Config.LOCAL_VECTOR_PATH,
+                ivf_threshold=Config.LOCAL_VECTOR_IVF_THRESHOLD
+            )
+        else:
+            self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+            self.vector_store = PineconeVectorStore(self.pc.Index(Config.PINECONE_INDEX_NAME))
+        self.embeddings = CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(
+                model=Config.EMBEDDING_MODEL,
+                google_api_key=Config.GOOGLE_API_KEY
+            ),
+            model=Config.EMBEDDING_MODEL,
+            db_path=Config.EMBEDDING_CACHE_PATH
+        )
+        
+        # Local copy of the transactions sheet, synced incrementally
+        self.transactions = TransactionStore(
+            Config.TRANSACTION_DB_PATH,
+            sheets_client=SheetsClient(Config.GOOGLE_SHEETS_CREDENTIALS, Config.EXPENSE_SHEET_NAME),
+            sync_interval=Config.SHEETS_SYNC_INTERVAL,
+            full_sync_interval=Config.SHEETS_FULL_SYNC_INTERVAL
+        )
+        self.analytics = SpendingAnalytics(self.transactions)
+        self.ingestion = ExpenseIngestionPipeline(
+            self.transactions,
+            self.embeddings,
+            self.vector_store,
+            embed_batch_size=Config.INGEST_EMBED_BATCH_SIZE,
+            upsert_batch_size=Config.INGEST_UPSERT_BATCH_SIZE,
+            max_concurrency=Config.INGEST_CONCURRENCY
         )
         
+        # BM25 index over descriptions, merchants and amounts for hybrid search
+        self.lexical_index = BM25Index()
+        self._lexical_row = 0
+        self._lexical_revision = self.transactions.revision()
+        self._lexical_lock = threading.RLock()
+        
         self.system_prompt = """You are a Personal Expense Agent. Your role is to provide accurate and relevant information about the user's expenses.
 
 Tools available:
@@ -31,12 +73,15 @@ Tools available:
 - calculate_spending: Calculate total spending for a category or time period
 
 When to use each tool:
-- Use query_expenses for historical expense searches and patterns
+- Use query_expenses for historical expense searches and patterns; pass date, category or amount filters when the question names them (e.g. "coffee purchases in June")
 - Use get_credit_card_transactions for recent transaction data
 - Use calculate_spending for aggregating expense data
 
 Always provide clear, actionable insights about expenses."""
         
+        # Tool calls from one model turn run concurrently on a bounded per-agent pool
+        self.tool_runner = ToolRunner("expense", max_workers=Config.AGENT_TOOL_CONCURRENCY)
+        
         self.agent = create_agent(
             model=self.llm,
             tools=self._create_tools(),
@@ -46,16 +91,27 @@ Always provide clear, actionable insights about expenses."""
     def _create_tools(self) -> List:
         """Create expense-related tools"""
         
-        @tool
-        def query_expenses(query: str) -> str:
+        @self.tool_runner.tool
+        def query_expenses(query: str, start_date: str = "", end_date: str = "", category: str = "",
+                           min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                           mode: str = "hybrid") -> str:
             """Search expense history using semantic search.
             
             Args:
                 query: Natural language query about expenses
+                start_date: Optional earliest date (YYYY-MM-DD)
+                end_date: Optional latest date (YYYY-MM-DD)
+                category: Optional category to restrict to
+                min_amount: Optional minimum amount
+                max_amount: Optional maximum amount
+                mode: "hybrid" (default), "keyword" for exact merchant/amount lookups, or "semantic"
             """
-            return self._query_expenses(query)
+            return self._query_expenses(query, {
+                "start_date": start_date, "end_date": end_date, "category": category,
+                "min_amount": min_amount, "max_amount": max_amount
+            }, mode)
         
-        @tool
+        @self.tool_runner.tool
         def get_credit_card_transactions(start_date: str = "", end_date: str = "") -> str:
             """Get credit card transactions.
             
@@ -65,37 +121,95 @@ Always provide clear, actionable insights about expenses."""
             """
             return self._get_credit_card_transactions({"start_date": start_date, "end_date": end_date} if start_date or end_date else {})
         
-        @tool
+        @self.tool_runner.tool
         def calculate_spending(category: str = "", time_period: str = "") -> str:
             """Calculate total spending.
             
             Args:
-                category: Optional category filter
-                time_period: Optional time period filter
+                category: Optional category, matched exactly (case-insensitive), e.g. "Food"
+                time_period: Optional time period, e.g. "last quarter", "March", "2024", "last 30 days",
+                    "since March", "2024-01-01 to 2024-03-31"
             """
             return self._calculate_spending({"category": category, "time_period": time_period})
         
         return [query_expenses, get_credit_card_transactions, calculate_spending]
     
-    def _query_expenses(self, query: str) -> str:
-        """Query expenses using vector search"""
+    def _refresh_lexical_index(self):
+        """Index transactions added to the local store since the last refresh
+        
+        Reads only the local store, never the sheet: syncing is left to the
+        periodic ingestion job and the tools that read transactions directly.
+        """
+        with self._lexical_lock:
+            revision = self.transactions.revision()
+            if revision != self._lexical_revision:
+                # Rows already indexed were edited or deleted in the sheet
+                self.lexical_index = BM25Index()
+                self._lexical_row = 0
+                self._lexical_revision = revision
+            while True:
+                rows = self.transactions.rows_after(self._lexical_row, 1000)
+                if not rows:
+                    return
+                for row in rows:
+                    metadata = {
+                        'description': row['description'],
+                        'merchant': row['merchant'],
+                        'category': row['category'],
+                        'amount': row['amount'],
+                        'date': row['date'] or '',
+                        **filter_metadata(row),
+                    }
+                    text = f"{row['description']} {row['merchant']} {row['category']} {row['amount']:.2f}"
+                    self.lexical_index.add(content_hash(row), text, metadata)
+                self._lexical_row = rows[-1]['row']
+    
+    def _search_expenses(self, query: str, filters: Optional[dict] = None, mode: str = "hybrid",
+                         top_k: int = 5) -> List[dict]:
+        """Return matching expense metadata using keyword, semantic or hybrid search"""
+        candidates = top_k * 4
+        lexical, payloads = [], {}
+        if mode in ("hybrid", "keyword"):
+            with self._lexical_lock:
+                self._refresh_lexical_index()
+                with span("expense.lexical_search"):
+                    lexical = self.lexical_index.search(query, candidates, filters)
+                payloads = {doc_id: self.lexical_index.payloads[doc_id] for doc_id, _ in lexical}
+                keyword_only = mode == "keyword" or self.lexical_index.is_keyword_query(query)
+            # Pure keyword lookups (merchant names, amounts) skip the embedding call
+            if keyword_only:
+                return [payloads[doc_id] for doc_id, _ in lexical[:top_k]]
+        
+        # Create embedding for query
+        query_embedding = self.embeddings.embed_query(query)
+        
+        # Search the vector index, pre-filtered by metadata
+        matches = self.vector_store.query(
+            query_embedding, top_k=candidates if lexical else top_k, filter=filters
+        )
+        if not lexical:
+            return [match['metadata'] for match in matches[:top_k]]
+        
+        metadata = dict(payloads)
+        metadata.update({match['id']: match['metadata'] for match in matches})
+        fused = reciprocal_rank_fusion(
+            [doc_id for doc_id, _ in lexical],
+            [match['id'] for match in matches]
+        )
+        return [metadata[doc_id] for doc_id, _ in fused[:top_k]]
+    
+    @memoize_in_request("expense.query_expenses")
+    @traced("tool.query_expenses")
+    def _query_expenses(self, query: str, filters: Optional[dict] = None, mode: str = "hybrid") -> str:
+        """Query expenses using keyword and vector search"""
         try:
-            # Create embedding for query
-            query_embedding = self.embeddings.embed_query(query)
-            
-            # Search Pinecone
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=5,
-                include_metadata=True
-            )
+            results = self._search_expenses(query, filters, mode)
             
-            if not results['matches']:
+            if not results:
                 return "No matching expenses found."
             
             expense_summary = []
-            for match in results['matches']:
-                metadata = match['metadata']
+            for metadata in results:
                 expense_summary.append(
                     f"- {metadata.get('description', 'N/A')}: ${metadata.get('amount', 0)} "
                     f"on {metadata.get('date', 'N/A')} (Category: {metadata.get('category', 'N/A')})"
@@ -105,70 +219,147 @@ Always provide clear, actionable insights about expenses."""
         except Exception as e:
             return f"Error querying expenses: {str(e)}"
     
+    @staticmethod
+    def _format_transaction(transaction: dict) -> str:
+        return (
+            f"- {transaction['description']}: ${transaction['amount']:.2f} "
+            f"on {transaction['date']} (Category: {transaction['category']})"
+        )
+    
+    @memoize_in_request("expense.get_credit_card_transactions")
+    @traced("tool.get_credit_card_transactions")
     def _get_credit_card_transactions(self, input_data: str) -> str:
-        """Get credit card transactions from Google Sheets"""
+        """Get credit card transactions from the local copy of Google Sheets"""
         try:
             import json
-            from datetime import datetime, timedelta
             
-            params = json.loads(input_data) if isinstance(input_data, str) else {}
+            params = json.loads(input_data) if isinstance(input_data, str) else input_data or {}
             
-            # Initialize Google Sheets
-            scope = ['https://spreadsheets.google.com/feeds',
-                    'https://www.googleapis.com/auth/drive']
-            creds = Credentials.from_service_account_file(
-                Config.GOOGLE_SHEETS_CREDENTIALS,
-                scopes=scope
-            )
-            client = gspread.authorize(creds)
-            
-            # Open the sheet
-            sheet = client.open(Config.EXPENSE_SHEET_NAME).sheet1
-            records = sheet.get_all_records()
+            self.transactions.sync()
             
             # Filter by date if provided
-            if 'start_date' in params or 'end_date' in params:
-                # Filter logic here
-                pass
-            
-            transactions = []
-            for record in records[:10]:  # Last 10 transactions
-                transactions.append(
-                    f"- {record.get('Description')}: ${record.get('Amount')} "
-                    f"on {record.get('Date')} (Category: {record.get('Category')})"
-                )
+            start_date = parse_date(params.get('start_date'))
+            end_date = parse_date(params.get('end_date'))
+            for key, parsed in (('start_date', start_date), ('end_date', end_date)):
+                if params.get(key) and parsed is None:
+                    return f"Error retrieving transactions: could not parse {key} '{params[key]}', use YYYY-MM-DD"
+            if start_date or end_date:
+                records = self.transactions.between(start_date, end_date, limit=50)
+                heading = "Transactions"
+            else:
+                records = self.transactions.recent(10)  # Last 10 transactions
+                heading = "Recent transactions"
+            
+            if not records:
+                return "No transactions found."
+            
+            transactions = [self._format_transaction(record) for record in records]
             
-            return "Recent transactions:\n" + "\n".join(transactions)
+            return f"{heading}:\n" + "\n".join(transactions)
         except Exception as e:
             return f"Error retrieving transactions: {str(e)}"
     
+    @memoize_in_request("expense.calculate_spending")
+    @traced("tool.calculate_spending")
     def _calculate_spending(self, input_data: str) -> str:
         """Calculate total spending"""
         try:
             import json
             params = json.loads(input_data) if isinstance(input_data, str) else input_data
             
-            category = params.get('category')
-            time_period = params.get('time_period')
+            category = params.get('category') or ""
+            time_period = params.get('time_period') or ""
             
-            # This would query your expense database
-            # For demo purposes, returning a placeholder
-            total = 1250.75  # This would be calculated from actual data
+            try:
+                start, end = parse_time_period(time_period)
+            except ValueError:
+                return (
+                    f"Error calculating spending: could not understand the time period '{time_period}'. "
+                    "Ask the user for explicit dates, e.g. '2024-01-01 to 2024-03-31'."
+                )
+            self.transactions.sync()
+            summary = self.analytics.summary(category, start, end)
             
             result = f"Total spending"
             if category:
                 result += f" on {category}"
             if time_period:
                 result += f" for {time_period}"
-            result += f": ${total}"
+                if start or end:
+                    result += f" ({start or 'start'} to {end or 'today'})"
+            result += f": ${summary['total']:.2f}"
+            if not summary['count']:
+                return result + " (no matching transactions)"
+            
+            result += f" across {summary['count']} transactions (average ${summary['average']:.2f})"
+            
+            if summary['top_merchants']:
+                result += "\nTop merchants:\n" + "\n".join(
+                    f"- {merchant['merchant']}: ${merchant['total']:.2f} ({merchant['count']} transactions)"
+                    for merchant in summary['top_merchants']
+                )
+            if len(summary['monthly']) > 1:
+                lines = []
+                for month in summary['monthly']:
+                    line = f"- {month['month']}: ${month['total']:.2f}"
+                    if month['percent'] is not None:
+                        line += f" ({month['percent']:+.1f}% vs previous month)"
+                    elif month['delta'] is not None:
+                        line += f" ({month['delta']:+.2f} vs previous month)"
+                    lines.append(line)
+                result += "\nBy month:\n" + "\n".join(lines)
             
             return result
         except Exception as e:
             return f"Error calculating spending: {str(e)}"
     
+    def ingest_expenses(self) -> IngestionStats:
+        """Sync the sheet and push new transactions into the vector index
+
+        Also reconciles edits and deletions when a full sync is due.
+        """
+        self.transactions.sync(force=True, full=True)
+        return self.ingestion.run()
+    
+    def start_ingestion(self, interval: float) -> threading.Thread:
+        """Run ingest_expenses now and then every `interval` seconds in the background"""
+        def loop():
+            while True:
+                try:
+                    with span("expense.ingest"):
+                        stats = self.ingest_expenses()
+                        self._refresh_lexical_index()
+                    if stats.rows_read:
+                        print(f"Expense ingestion: {stats}")
+                except Exception as e:
+                    print(f"Expense ingestion failed: {e}")
+                time.sleep(interval)
+        
+        thread = threading.Thread(target=loop, name="expense-ingestion", daemon=True)
+        thread.start()
+        return thread
+    
     def run(self, query: str) -> str:
         """Execute expense agent"""
-        result = self.agent.invoke({"messages": [{"role": "user", "content": query}]})
+        with span("agent.expense"):
+            result = self.agent.invoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.expense", *result.get("messages", []))
+        return self._final_content(result)
+    
+    async def arun(self, query: str) -> str:
+        """Execute expense agent without blocking the event loop"""
+        with span("agent.expense"):
+            result = await self.agent.ainvoke(
+                {"messages": [{"role": "user", "content": query}]}, config=self.tool_runner.config
+            )
+        record_llm_usage("agent.expense", *result.get("messages", []))
+        return self._final_content(result)
+    
+    @staticmethod
+    def _final_content(result) -> str:
+        # Extract the last message content
         messages = result.get("messages", [])
         if messages:
             last_message = messages[-1]
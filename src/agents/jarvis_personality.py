@@ -3,12 +3,15 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, SystemMessage
 from src.config import Config
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import record_llm_usage, span
 
 class JarvisPersonality:
     def __init__(self):
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-pro",
-            google_api_key=Config.GOOGLE_API_KEY_PERSONALITY
+            google_api_key=Config.GOOGLE_API_KEY_PERSONALITY,
+            **limiters.chat_model_kwargs("gemini_personality")
         )
         
         self.system_prompt = """You are JARVIS, the sophisticated and quick-witted AI assistant from Iron Man.
@@ -39,5 +42,7 @@ CRITICAL: Rewrite the given text ONLY. Do not add greetings, acknowledgments, or
         Equivalent to n8n's JARVIS Personality LLM chain
         """
         messages = self.prompt.format_messages(json_output=agent_output)
-        response = self.llm.invoke(messages)
+        with span("personality.llm"):
+            response = self.llm.invoke(messages)
+        record_llm_usage("personality.llm", response)
         return response.content
@@ -12,18 +12,94 @@ class Config:
     GOOGLE_API_KEY_PERSONALITY = os.getenv("GOOGLE_API_KEY_PERSONALITY", os.getenv("GOOGLE_API_KEY"))
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "your-jarvis-voice-id")
+    # Telegram voice notes are Ogg/Opus; MP3 replies are transcoded if Opus isn't available
+    TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "opus_48000_32")
+    TTS_OPUS_BITRATE = os.getenv("TTS_OPUS_BITRATE", "32k")
+    TTS_TRANSCODE_WORKERS = int(os.getenv("TTS_TRANSCODE_WORKERS", "2"))
+    TTS_OPUS_RETRY_SECONDS = float(os.getenv("TTS_OPUS_RETRY_SECONDS", "3600"))
     
     # Google Calendar
     GOOGLE_CALENDAR_CREDENTIALS = os.getenv("GOOGLE_CALENDAR_CREDENTIALS")
     
+    # Email (SMTP)
+    EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
+    EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+    SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+    SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+    SMTP_MAX_ATTEMPTS = int(os.getenv("SMTP_MAX_ATTEMPTS", "3"))
+    
     # Airtable (for contacts)
     AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
     AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
     AIRTABLE_TABLE_NAME = os.getenv("AIRTABLE_TABLE_NAME", "Contacts")
+    AIRTABLE_RATE_LIMIT = float(os.getenv("AIRTABLE_RATE_LIMIT", "5"))
+    AIRTABLE_FLUSH_INTERVAL = float(os.getenv("AIRTABLE_FLUSH_INTERVAL", "0.5"))
+    CONTACT_CACHE_SIZE = int(os.getenv("CONTACT_CACHE_SIZE", "512"))
+    CONTACT_CACHE_TTL = float(os.getenv("CONTACT_CACHE_TTL", "300"))
     
     # Pinecone (for expense vector DB)
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "expenses")
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # "pinecone" or "local"
+    LOCAL_VECTOR_PATH = os.getenv("LOCAL_VECTOR_PATH", "data/vectors")
+    LOCAL_VECTOR_IVF_THRESHOLD = int(os.getenv("LOCAL_VECTOR_IVF_THRESHOLD", "50000"))
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embeddings.db")
+    INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+    INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "100"))
+    INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+    INGEST_INTERVAL = float(os.getenv("INGEST_INTERVAL", "900"))  # seconds, 0 disables
+    
+    # Google Sheets (for credit card transactions)
+    GOOGLE_SHEETS_CREDENTIALS = os.getenv("GOOGLE_SHEETS_CREDENTIALS")
+    EXPENSE_SHEET_NAME = os.getenv("EXPENSE_SHEET_NAME", "Credit Card Transactions")
+    TRANSACTION_DB_PATH = os.getenv("TRANSACTION_DB_PATH", "data/transactions.db")
+    SHEETS_SYNC_INTERVAL = float(os.getenv("SHEETS_SYNC_INTERVAL", "60"))
+    # Full re-read that picks up edited, inserted and deleted rows (run by the ingestion job)
+    SHEETS_FULL_SYNC_INTERVAL = float(os.getenv("SHEETS_FULL_SYNC_INTERVAL", "3600"))
+    
+    # Upstream limits: requests per second and maximum concurrent calls.
+    # Concurrency adapts (AIMD) to 429/5xx responses; Retry-After is honoured.
+    # A rate of 0 means no limit until the upstream throttles, then adaptive.
+    UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+    GEMINI_RATE_LIMIT = float(os.getenv("GEMINI_RATE_LIMIT", "0"))
+    GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+    # The personality model uses its own API key, so it has its own quota
+    GEMINI_PERSONALITY_RATE_LIMIT = float(os.getenv("GEMINI_PERSONALITY_RATE_LIMIT", "0"))
+    GEMINI_PERSONALITY_CONCURRENCY = int(os.getenv("GEMINI_PERSONALITY_CONCURRENCY", "4"))
+    EMBEDDINGS_RATE_LIMIT = float(os.getenv("EMBEDDINGS_RATE_LIMIT", "10"))
+    EMBEDDINGS_CONCURRENCY = int(os.getenv("EMBEDDINGS_CONCURRENCY", "4"))
+    ELEVENLABS_RATE_LIMIT = float(os.getenv("ELEVENLABS_RATE_LIMIT", "2"))
+    ELEVENLABS_CONCURRENCY = int(os.getenv("ELEVENLABS_CONCURRENCY", "2"))
+    AIRTABLE_CONCURRENCY = int(os.getenv("AIRTABLE_CONCURRENCY", "5"))
+    CALENDAR_RATE_LIMIT = float(os.getenv("CALENDAR_RATE_LIMIT", "10"))
+    CALENDAR_CONCURRENCY = int(os.getenv("CALENDAR_CONCURRENCY", "5"))
+    SHEETS_RATE_LIMIT = float(os.getenv("SHEETS_RATE_LIMIT", "1"))
+    SHEETS_CONCURRENCY = int(os.getenv("SHEETS_CONCURRENCY", "2"))
+    PINECONE_RATE_LIMIT = float(os.getenv("PINECONE_RATE_LIMIT", "50"))
+    PINECONE_CONCURRENCY = int(os.getenv("PINECONE_CONCURRENCY", "8"))
+    STT_RATE_LIMIT = float(os.getenv("STT_RATE_LIMIT", "2"))
+    STT_CONCURRENCY = int(os.getenv("STT_CONCURRENCY", "2"))
+    
+    # Maximum concurrent tool calls per sub-agent turn
+    AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+    
+    # Start the predicted agent's read-only prefetch while the router LLM runs
+    SPECULATIVE_ROUTING = os.getenv("SPECULATIVE_ROUTING", "false").lower() == "true"
+    
+    # Process model
+    WORKERS = int(os.getenv("WORKERS", "1"))  # >1 runs a supervisor with sharded worker processes
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "data/cache.db")
+    # Seconds a stopping process may spend delivering queued emails and writes
+    SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+    
+    # Telemetry
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the /metrics endpoint
+    SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "10"))
+    SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG", "")
     
     # Model settings
     ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"
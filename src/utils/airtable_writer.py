@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from src.utils.rate_limit import UpstreamLimiter, limiters
+from src.utils.telemetry import span
+
+# Airtable accepts at most 10 records per batch_create request
+AIRTABLE_MAX_BATCH = 10
+
+class AirtableBatchWriter:
+    """Write-behind queue that coalesces creates into batch_create calls
+
+    Records are flushed once a batch is full or `flush_interval` seconds
+    after the first record of a batch arrived. Each submit() returns a
+    Future resolving to the created record ID.
+    """
+
+    def __init__(self, table, batch_size: int = AIRTABLE_MAX_BATCH,
+                 flush_interval: float = 0.5, rate_limiter: Optional[UpstreamLimiter] = None,
+                 max_in_flight: int = 5):
+        self.table = table
+        self.batch_size = min(batch_size, AIRTABLE_MAX_BATCH)
+        self.flush_interval = flush_interval
+        self.rate_limiter = rate_limiter or limiters.get("airtable")
+        self.max_in_flight = max_in_flight
+        self._queue: "queue.Queue" = queue.Queue()
+        self._executor = None
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, fields: Dict) -> Future:
+        """Queue a record for creation"""
+        if self._closed:
+            raise RuntimeError("AirtableBatchWriter is closed")
+        future = Future()
+        self._queue.put((fields, future))
+        self._ensure_worker()
+        return future
+
+    def submit_many(self, records: List[Dict]) -> List[Future]:
+        """Queue several records for creation"""
+        return [self.submit(fields) for fields in records]
+
+    def close(self, timeout: float = None):
+        """Flush pending records and stop the worker"""
+        self._closed = True
+        self._queue.put(None)
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight, thread_name_prefix="airtable-batch"
+                )
+                self._worker = threading.Thread(
+                    target=self._run, name="airtable-writer", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Hand the batch off so several requests can be in flight; the
+            # limiter keeps the overall rate under the API limit
+            self._executor.submit(self._flush, batch)
+        self._executor.shutdown(wait=True)
+
+    def _flush(self, batch: List):
+        records, futures = [], []
+        for fields, future in batch:
+            if future.set_running_or_notify_cancel():
+                records.append(fields)
+                futures.append(future)
+        if not records:
+            return
+        try:
+            with span("airtable.batch_create"):
+                created = self.rate_limiter.call(self.table.batch_create, records)
+            for future, record in zip(futures, created):
+                future.set_result(record['id'])
+            if len(created) < len(futures):
+                raise RuntimeError(
+                    f"Airtable created {len(created)} of {len(records)} records in the batch"
+                )
+        except Exception as e:
+            # Never leave a caller waiting on a record that wasn't created
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
@@ -0,0 +1,39 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.tools import StructuredTool
+
+class ToolRunner:
+    """Bounded pool for one agent's tools, giving each a coroutine implementation
+
+    The upstream clients (pyairtable, googleapiclient, gspread, smtplib) are
+    blocking, so a tool's coroutine runs its sync function on this agent's
+    pool. When the model asks for several tools in one turn, create_agent
+    gathers the coroutines. They then run concurrently, at most
+    `max_workers` at a time, and results come back in call order.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-tools")
+
+    async def run(self, func, *args, **kwargs):
+        # Copy the context so the request memo and trace follow the call
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    def tool(self, func) -> StructuredTool:
+        """Drop-in for @tool that also sets `coroutine=` to run func on this pool"""
+        async def coroutine(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+        return StructuredTool.from_function(func=func, coroutine=coroutine)
+
+    @property
+    def config(self) -> dict:
+        """Run config bounding the sync invoke() path to the same limit"""
+        return {"max_concurrency": self.max_workers}
@@ -0,0 +1,51 @@
+import contextvars
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pydub import AudioSegment
+
+from src.utils.telemetry import record_bytes, span
+
+def is_ogg_opus(data: bytes) -> bool:
+    """True for an Ogg container whose first stream is Opus"""
+    return data[:4] == b"OggS" and b"OpusHead" in data[:64]
+
+def mp3_to_ogg_opus(data: bytes, bitrate: str = "32k") -> bytes:
+    """Transcode MP3 to a Telegram voice note: mono 48 kHz Opus in Ogg
+
+    Uses libopus's VoIP mode, which is tuned for speech, with 20 ms frames.
+    """
+    with span("tts.transcode"):
+        segment = AudioSegment.from_file(io.BytesIO(data), format="mp3")
+        segment = segment.set_channels(1).set_frame_rate(48000)
+        output = io.BytesIO()
+        segment.export(
+            output,
+            format="ogg",
+            codec="libopus",
+            bitrate=bitrate,
+            parameters=["-application", "voip", "-frame_duration", "20", "-vbr", "on"]
+        )
+        encoded = output.getvalue()
+    record_bytes("tts.transcode", "in", len(data))
+    record_bytes("tts.transcode", "out", len(encoded))
+    return encoded
+
+
+class OpusTranscoder:
+    """Worker pool for MP3 -> Ogg/Opus conversion
+
+    pydub runs ffmpeg as a subprocess, so threads are enough to encode
+    several replies at once without blocking the caller.
+    """
+
+    def __init__(self, workers: int = 2, bitrate: str = "32k"):
+        self.bitrate = bitrate
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="opus-transcode")
+
+    def submit(self, data: bytes) -> Future:
+        context = contextvars.copy_context()
+        return self.executor.submit(context.run, mp3_to_ogg_opus, data, self.bitrate)
+
+    def to_opus(self, data: bytes, timeout: float = 30.0) -> bytes:
+        return self.submit(data).result(timeout)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import List
+
+from src.utils.ttl_cache import TTLCache
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import span
+
+class CachedEmbeddings:
+    """Embeddings wrapper with an in-memory LRU and a persistent SQLite tier
+
+    Entries are keyed by model name and text, so switching models never
+    returns stale vectors. Exposes the same embed_query/embed_documents
+    interface as the wrapped LangChain embeddings.
+    """
+
+    def __init__(self, embeddings, model: str, db_path: str = None, maxsize: int = 2048):
+        self.embeddings = embeddings
+        self.model = model
+        self.memory = TTLCache(maxsize=maxsize, ttl=float("inf"))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = None
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self.conn.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _load(self, keys: List[str]) -> dict:
+        if self.conn is None or not keys:
+            return {}
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for key, blob in self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, items: dict):
+        for key, vector in items.items():
+            self.memory.set(key, vector)
+        if self.conn is None or not items:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+            )
+
+    def _lookup(self, texts: List[str]) -> tuple:
+        keys = [self._key(text) for text in texts]
+        found, missing = self.memory.get_many(dict.fromkeys(keys))
+        persisted = self._load(missing)
+        for key, vector in persisted.items():
+            self.memory.set(key, vector)
+        found.update(persisted)
+        return keys, found
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found = self._lookup([text])
+        if keys[0] in found:
+            self.hits += 1
+            return found[keys[0]]
+        self.misses += 1
+        with span("embeddings.query"):
+            vector = limiters.call("embeddings", self.embeddings.embed_query, text)
+        self._store({keys[0]: vector})
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, sending only uncached ones upstream in a single call"""
+        keys, found = self._lookup(texts)
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                pending.setdefault(key, text)
+        self.hits += len(texts) - len(pending)
+        self.misses += len(pending)
+        if pending:
+            with span("embeddings.documents"):
+                vectors = limiters.call("embeddings", self.embeddings.embed_documents, list(pending.values()))
+            computed = dict(zip(pending.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
@@ -0,0 +1,202 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.utils.transaction_store import TransactionStore
+from src.utils.vector_store import VectorStore, filter_metadata
+
+CHECKPOINT_KEY = 'ingested_row'
+REVISION_KEY = 'ingested_revision'
+
+@dataclass
+class IngestionStats:
+    rows_read: int = 0
+    duplicates: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Vectors upserted per second"""
+        return self.upserted / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"read {self.rows_read} rows, skipped {self.duplicates} duplicates, "
+            f"embedded {self.embedded}, upserted {self.upserted}, deleted {self.deleted} "
+            f"in {self.seconds:.2f}s ({self.throughput:.1f} vectors/s)"
+        )
+
+
+def content_hash(transaction: Dict) -> str:
+    """Stable ID for a transaction from its sheet row and content
+
+    The row keeps genuinely repeated purchases (same day, merchant and
+    amount) apart; the content makes an edited row a new vector.
+    """
+    parts = [
+        str(transaction.get('row') or ''),
+        transaction.get('date') or '',
+        transaction.get('description') or '',
+        transaction.get('merchant') or '',
+        transaction.get('category') or '',
+        f"{float(transaction.get('amount') or 0):.2f}",
+    ]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def expense_text(transaction: Dict) -> str:
+    """Text that gets embedded for a transaction"""
+    return (
+        f"{transaction['description']} at {transaction['merchant']} "
+        f"(Category: {transaction['category']}) ${transaction['amount']:.2f} on {transaction['date']}"
+    )
+
+
+class ExpenseIngestionPipeline:
+    """Moves new transactions from the local store into the vector index
+
+    Transactions are read in sheet order after a persisted checkpoint,
+    skipped if their content hash was already ingested, embedded with embed_documents in batches
+    and upserted in sized batches across a bounded thread pool. Vector IDs
+    are content hashes, so re-running after a crash is idempotent and the
+    checkpoint only advances once a chunk is fully upserted.
+
+    Each sheet row keeps one vector: when a row's hash changes the old
+    vector is deleted, and a walk that reaches the end of the store deletes
+    the vectors of rows that no longer exist.
+    """
+
+    def __init__(self, store: TransactionStore, embeddings, vector_store: VectorStore,
+                 embed_batch_size: int = 64, upsert_batch_size: int = 100,
+                 max_concurrency: int = 4):
+        self.store = store
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.max_concurrency = max_concurrency
+        with self.store._lock, self.store.conn:
+            self.store.conn.execute(
+                "CREATE TABLE IF NOT EXISTS ingested (hash TEXT PRIMARY KEY, row INTEGER)"
+            )
+            self.store.conn.execute("CREATE INDEX IF NOT EXISTS ingested_row ON ingested (row)")
+
+    def _known_hashes(self, hashes: List[str]) -> set:
+        if not hashes:
+            return set()
+        placeholders = ", ".join("?" for _ in hashes)
+        with self.store._lock:
+            return {
+                row['hash'] for row in self.store.conn.execute(
+                    f"SELECT hash FROM ingested WHERE hash IN ({placeholders})", hashes
+                )
+            }
+
+    def _stale_hashes(self, current: Dict[str, Dict]) -> List[str]:
+        """Ingested hashes of the given rows that their current hashes replace"""
+        rows = [row['row'] for row in current.values()]
+        placeholders = ", ".join("?" for _ in rows)
+        with self.store._lock:
+            return [
+                row['hash'] for row in self.store.conn.execute(
+                    f"SELECT hash FROM ingested WHERE row IN ({placeholders})", rows
+                ) if row['hash'] not in current
+            ]
+
+    def _orphaned_hashes(self) -> List[str]:
+        """Ingested hashes of rows no longer in the store"""
+        with self.store._lock:
+            return [
+                row['hash'] for row in self.store.conn.execute(
+                    "SELECT hash FROM ingested WHERE row NOT IN (SELECT row FROM transactions)"
+                )
+            ]
+
+    def _delete(self, hashes: List[str]):
+        """Remove vectors, then forget their hashes"""
+        if not hashes:
+            return
+        for i in range(0, len(hashes), self.upsert_batch_size):
+            self.vector_store.delete(hashes[i:i + self.upsert_batch_size])
+        with self.store._lock, self.store.conn:
+            self.store.conn.executemany("DELETE FROM ingested WHERE hash = ?", [(key,) for key in hashes])
+
+    def _upsert(self, vectors: List[Dict]) -> int:
+        self.vector_store.upsert(vectors)
+        return len(vectors)
+
+    def run(self, chunk_size: int = 500, limit: int = None) -> IngestionStats:
+        """Ingest transactions added since the last checkpoint"""
+        stats = IngestionStats()
+        started = time.perf_counter()
+        checkpoint = int(self.store.get_state(CHECKPOINT_KEY, '0'))
+        revision = self.store.revision()
+        if self.store.get_state(REVISION_KEY, str(revision)) != str(revision):
+            # Synced rows changed; walk the whole store again, known hashes are skipped
+            checkpoint = 0
+        # Together, so a run that fails before its first chunk still restarts the walk
+        self.store.set_states({REVISION_KEY: revision, CHECKPOINT_KEY: checkpoint})
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while limit is None or stats.rows_read < limit:
+                rows = self.store.rows_after(checkpoint, chunk_size)
+                if not rows:
+                    orphaned = self._orphaned_hashes()
+                    self._delete(orphaned)
+                    stats.deleted += len(orphaned)
+                    break
+                stats.rows_read += len(rows)
+
+                fresh = {}
+                for row in rows:
+                    fresh.setdefault(content_hash(row), row)
+                known = self._known_hashes(list(fresh))
+                pending = [(key, row) for key, row in fresh.items() if key not in known]
+                stats.duplicates += len(rows) - len(pending)
+
+                vectors = []
+                for i in range(0, len(pending), self.embed_batch_size):
+                    batch = pending[i:i + self.embed_batch_size]
+                    embedded = self.embeddings.embed_documents([expense_text(row) for _, row in batch])
+                    stats.embedded += len(batch)
+                    for (key, row), values in zip(batch, embedded):
+                        vectors.append({
+                            'id': key,
+                            'values': values,
+                            'metadata': {
+                                'description': row['description'],
+                                'merchant': row['merchant'],
+                                'category': row['category'],
+                                'amount': row['amount'],
+                                'date': row['date'] or '',
+                                'row': row['row'],
+                                **filter_metadata(row),
+                            }
+                        })
+
+                futures = [
+                    executor.submit(self._upsert, vectors[i:i + self.upsert_batch_size])
+                    for i in range(0, len(vectors), self.upsert_batch_size)
+                ]
+                for future in futures:
+                    stats.upserted += future.result()
+
+                # Edited rows: drop the vector of the content they replaced
+                stale = self._stale_hashes(fresh)
+                self._delete(stale)
+                stats.deleted += len(stale)
+
+                checkpoint = rows[-1]['row']
+                with self.store._lock, self.store.conn:
+                    self.store.conn.executemany(
+                        "INSERT OR IGNORE INTO ingested (hash, row) VALUES (?, ?)",
+                        [(key, row['row']) for key, row in pending]
+                    )
+                    self.store._write_states({CHECKPOINT_KEY: checkpoint})
+
+        stats.seconds = time.perf_counter() - started
+        return stats
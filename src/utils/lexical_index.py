@@ -0,0 +1,129 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.vector_store import VectorStore
+
+_TOKEN = re.compile(r"\$?\d+(?:[.,]\d+)*|[a-z0-9]+(?:['&][a-z0-9]+)*")
+
+STOPWORDS = {
+    "a", "an", "and", "at", "by", "for", "from", "i", "in", "my", "of", "on",
+    "the", "to", "with", "me", "show", "find", "what", "did", "spend",
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; amounts are normalised so "$42.1" matches "42.10" """
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        if token[0] == "$" or token[0].isdigit():
+            number = token.lstrip("$").replace(",", "")
+            try:
+                tokens.append(f"{float(number):.2f}")
+                continue
+            except ValueError:
+                pass
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.payloads: Dict[str, Dict] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.postings
+
+    def add(self, doc_id: str, text: str, payload: Dict = None):
+        """Index a document, replacing any previous version with the same ID"""
+        tokens = tokenize(text)
+        with self._lock:
+            if doc_id in self.lengths:
+                self._remove(doc_id)
+            counts = Counter(tokens)
+            for token, count in counts.items():
+                self.postings[token][doc_id] = count
+            self.doc_terms[doc_id] = list(counts)
+            self.lengths[doc_id] = len(tokens)
+            self._total_length += len(tokens)
+            self.payloads[doc_id] = payload or {}
+
+    def _remove(self, doc_id: str):
+        for token in self.doc_terms.pop(doc_id):
+            postings = self.postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[token]
+        self._total_length -= self.lengths.pop(doc_id)
+        self.payloads.pop(doc_id, None)
+
+    def search(self, query: str, top_k: int = 10, filter: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """Return (doc_id, score) pairs, best first"""
+        terms = [token for token in tokenize(query) if token not in STOPWORDS]
+        with self._lock:
+            n = len(self.lengths)
+            if not n or not terms:
+                return []
+            average_length = self._total_length / n
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(terms):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            if filter:
+                bounds = VectorStore._filter_bounds(filter)
+                scores = {
+                    doc_id: score for doc_id, score in scores.items()
+                    if _matches(self.payloads[doc_id], bounds)
+                }
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def is_keyword_query(self, query: str, max_terms: int = 3) -> bool:
+        """True for short queries whose every term is a known word or amount
+
+        Such lookups ("Uber", "$42.10") are answered lexically without an
+        embedding call.
+        """
+        terms = [token for token in tokenize(query) if token not in STOPWORDS]
+        return 0 < len(terms) <= max_terms and all(term in self.postings for term in terms)
+
+
+def _matches(metadata: Dict, bounds: Dict) -> bool:
+    ordinal = metadata.get('date_ordinal', 0)
+    if bounds['start'] is not None and ordinal < bounds['start']:
+        return False
+    if bounds['end'] is not None and ordinal > bounds['end']:
+        return False
+    if bounds['category'] and metadata.get('category_key') != bounds['category']:
+        return False
+    amount = float(metadata.get('amount') or 0)
+    if bounds['min_amount'] is not None and amount < float(bounds['min_amount']):
+        return False
+    if bounds['max_amount'] is not None and amount > float(bounds['max_amount']):
+        return False
+    return True
+
+def reciprocal_rank_fusion(*rankings: List[str], k: int = 60) -> List[Tuple[str, float]]:
+    """Merge ranked ID lists by summing 1 / (k + rank)"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,483 @@
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from src.config import Config
+from src.utils.telemetry import registry
+
+limiter_wait = registry.histogram(
+    "jarvis_limiter_wait_seconds", "Time spent waiting for an upstream limiter"
+)
+limiter_throttled = registry.counter(
+    "jarvis_limiter_throttled_total", "429/5xx responses seen per upstream"
+)
+limiter_window = registry.gauge(
+    "jarvis_limiter_window", "Current AIMD concurrency window per upstream"
+)
+limiter_rate = registry.gauge(
+    "jarvis_limiter_rate", "Current request rate limit per upstream, 0 when unlimited"
+)
+
+class TokenBucket:
+    """Token bucket limiting calls to `rate` per second with bursts up to `capacity`
+
+    A rate of 0 does not limit calls.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        """Change the rate, keeping the tokens already earned"""
+        self.adjust_rate(lambda _: rate)
+
+    def adjust_rate(self, update: Callable[[float], float]) -> float:
+        """Replace the rate with update(rate) atomically; returns the new rate"""
+        with self._lock:
+            self._refill()
+            self.rate = update(self.rate)
+            self.capacity = max(1.0, self.rate)
+            self._tokens = min(self._tokens, self.capacity)
+            return self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return the seconds to wait"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class SharedTokenBucket:
+    """TokenBucket whose state lives in a SQLite file shared by worker processes
+
+    Every process draws from the same budget, so a busy worker can use the
+    whole quota while the others are idle. Each acquisition is one short
+    IMMEDIATE transaction; the clock is wall time so processes agree on it.
+    A rate of 0 does not limit calls, and then never overwrites a rate
+    another process has already set.
+    """
+
+    def __init__(self, db_path: str, name: str, rate: float, capacity: float = None):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.name = name
+        self._lock = threading.Lock()
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                rate REAL NOT NULL
+            )
+        """)
+        capacity = capacity if capacity is not None else max(1.0, rate)
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO token_buckets (name, tokens, updated, rate) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET rate = excluded.rate WHERE excluded.rate > 0",
+                (name, capacity, time.time(), rate)
+            )
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated, rate = self.conn.execute(
+                    "SELECT tokens, updated, rate FROM token_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                capacity = max(1.0, rate)
+                state = {'tokens': min(capacity, tokens + max(0.0, now - updated) * rate), 'rate': rate}
+                yield state
+                self.conn.execute(
+                    "UPDATE token_buckets SET tokens = ?, updated = ?, rate = ? WHERE name = ?",
+                    (min(state['tokens'], max(1.0, state['rate'])), now, state['rate'], self.name)
+                )
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    @property
+    def rate(self) -> float:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT rate FROM token_buckets WHERE name = ?", (self.name,)
+            ).fetchone()[0]
+
+    def set_rate(self, rate: float):
+        self.adjust_rate(lambda _: rate)
+
+    def adjust_rate(self, update: Callable[[float], float]) -> float:
+        with self._transaction() as state:
+            state['rate'] = update(state['rate'])
+            return state['rate']
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        # A plain read is enough while unlimited; WAL lets it run alongside writers
+        if self.rate <= 0:
+            return 0.0
+        with self._transaction() as state:
+            if state['rate'] <= 0:
+                return 0.0
+            if state['tokens'] >= tokens:
+                state['tokens'] -= tokens
+                return 0.0
+            return (tokens - state['tokens']) / state['rate']
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+def _parse_retry_after(value) -> Optional[float]:
+    """Retry-After header as seconds: either a number or an HTTP date"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def response_status(obj) -> Tuple[Optional[int], Optional[float]]:
+    """HTTP status and Retry-After seconds from a client response or exception
+
+    Understands requests responses and HTTPError (pyairtable, gspread,
+    ElevenLabs), googleapiclient HttpError, Pinecone API exceptions and
+    Google API errors that carry an integer `code`.
+    """
+    for candidate in (obj, getattr(obj, "response", None), getattr(obj, "resp", None)):
+        if candidate is None:
+            continue
+        status = getattr(candidate, "status_code", None)
+        if not isinstance(status, int):
+            status = getattr(candidate, "status", None)
+        if isinstance(status, int):
+            headers = getattr(candidate, "headers", None)
+            if headers is None and isinstance(candidate, dict):
+                headers = candidate  # httplib2 responses are header dicts
+            headers = headers or {}
+            retry_after = headers.get("Retry-After", headers.get("retry-after"))
+            return status, _parse_retry_after(retry_after)
+    code = getattr(obj, "code", None)
+    if isinstance(code, int) and not isinstance(code, bool):
+        return code, None
+    return None, None
+
+def is_throttle(status: Optional[int]) -> bool:
+    return status is not None and (status == 429 or status >= 500)
+
+
+class UpstreamLimiter:
+    """Token bucket on request rate plus an AIMD window on concurrent calls
+
+    The bucket keeps the request rate at the configured quota. The window
+    grows by one slot per window's worth of successes and halves on a 429
+    or 5xx. Every call is also paused for Retry-After, or an exponential
+    backoff when none is given. call() retries throttled calls up to
+    max_retries.
+
+    With no rate configured (0) the bucket starts unlimited until the
+    upstream first throttles; it then starts at half the request rate
+    observed over the last `observe_window` seconds, halves on each
+    further throttle and grows back by at most min(rate, 1) request per
+    second for each observe_window's worth of successes. A shared bucket
+    carries that rate to every worker process.
+
+    Bucket reads and writes can hit SQLite, so they run outside the
+    condition that guards the window.
+    """
+
+    def __init__(self, name: str, rate: float, max_concurrency: int, min_concurrency: int = 1,
+                 max_retries: int = 3, backoff: float = 1.0, max_backoff: float = 30.0,
+                 min_rate: float = 0.1, observe_window: float = 10.0,
+                 bucket_factory: Callable = TokenBucket):
+        self.name = name
+        self.adaptive = not rate or rate <= 0
+        rate = 0.0 if self.adaptive else rate
+        self.bucket = bucket_factory(rate=rate, capacity=max(1.0, rate))
+        self.min_rate = min_rate
+        self.observe_window = observe_window
+        self._starts: deque = deque()
+        self.max_concurrency = max(min_concurrency, max_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.window = float(self.max_concurrency)
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._throttles = 0
+        self._cond = threading.Condition()
+        limiter_window.set(self.window, upstream=name)
+        limiter_rate.set(self.bucket.rate, upstream=name)
+
+    def _take_token(self) -> float:
+        """Take a token, or return the seconds to wait for one"""
+        wait = self.bucket.try_acquire()
+        if wait <= 0 and self.adaptive:
+            now = time.monotonic()
+            with self._cond:
+                self._starts.append(now)
+                while self._starts[0] < now - self.observe_window:
+                    self._starts.popleft()
+        return wait
+
+    def observed_rate(self) -> float:
+        """Requests started per second over the last observe_window seconds"""
+        with self._cond:
+            return len(self._starts) / self.observe_window
+
+    def wait_time(self) -> float:
+        """Seconds until a request may start, ignoring the concurrency window"""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        return self._take_token()
+
+    def acquire(self):
+        """Block for a concurrency slot, then for a token"""
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                elif self.in_flight >= int(self.window):
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+        while True:
+            wait = self._take_token()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        limiter_wait.observe(time.monotonic() - started, upstream=self.name)
+
+    def release(self, status: Optional[int] = None, retry_after: Optional[float] = None,
+                error: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            change = self._observe(status, retry_after, error)
+            self._cond.notify_all()
+        self._adjust_rate(change)
+
+    def observe(self, status: Optional[int] = None, retry_after: Optional[float] = None,
+                error: bool = False):
+        """Feed back the outcome of a call made without acquire()"""
+        with self._cond:
+            change = self._observe(status, retry_after, error)
+            self._cond.notify_all()
+        self._adjust_rate(change)
+
+    def _observe(self, status: Optional[int], retry_after: Optional[float], error: bool) -> int:
+        """Update the window and pause; returns -1, 1 or 0 to lower, raise or keep an adaptive rate"""
+        now = time.monotonic()
+        change = 0
+        if is_throttle(status):
+            limiter_throttled.inc(upstream=self.name, status=status)
+            self._throttles += 1
+            # Calls already in flight fail together; count that as one congestion event
+            if now - self._last_decrease >= 1.0:
+                self.window = max(float(self.min_concurrency), self.window / 2)
+                change = -1
+                self._last_decrease = now
+            if retry_after is None:
+                retry_after = min(self.backoff * 2 ** (self._throttles - 1), self.max_backoff)
+            self._paused_until = max(self._paused_until, now + retry_after)
+        elif not error and (status is None or status < 400):
+            self._throttles = 0
+            self.window = min(float(self.max_concurrency), self.window + 1.0 / self.window)
+            change = 1
+        limiter_window.set(self.window, upstream=self.name)
+        return change if self.adaptive else 0
+
+    def _adjust_rate(self, change: int):
+        """Apply an adaptive rate change from _observe; call without holding _cond"""
+        if change < 0:
+            # The first throttle starts from the rate observed before it
+            start = max(self.min_rate, self.observed_rate() / 2)
+            rate = self.bucket.adjust_rate(
+                lambda rate: max(self.min_rate, rate / 2) if rate > 0 else start
+            )
+        elif change > 0:
+            if self.bucket.rate <= 0:
+                return  # still unlimited
+            # Per success, so an observe_window of successes adds at most min(rate, 1)
+            window = self.observe_window
+            rate = self.bucket.adjust_rate(
+                lambda rate: rate + min(rate, 1.0) / max(1.0, rate * window) if rate > 0 else rate
+            )
+        else:
+            return
+        limiter_rate.set(rate, upstream=self.name)
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot around a call; exceptions are inspected for throttling"""
+        self.acquire()
+        try:
+            yield
+        except Exception as e:
+            self.release(*response_status(e), error=True)
+            raise
+        self.release()
+
+    def call(self, func, *args, **kwargs):
+        """Run func under the limiter, retrying 429/5xx errors and responses"""
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                status, retry_after = response_status(e)
+                self.release(status, retry_after, error=True)
+                if is_throttle(status) and attempt < self.max_retries:
+                    attempt += 1
+                    continue
+                raise
+            status, retry_after = (
+                response_status(result) if isinstance(getattr(result, "status_code", None), int)
+                else (None, None)
+            )
+            self.release(status, retry_after)
+            if is_throttle(status) and attempt < self.max_retries:
+                attempt += 1
+                continue
+            return result
+
+
+class LimiterRegistry:
+    """One UpstreamLimiter per upstream, configured from Config
+
+    Limits are read from `<NAME>_RATE_LIMIT` (requests per second) and
+    `<NAME>_CONCURRENCY` when an upstream is first used. With several
+    worker processes the rate budget is a SharedTokenBucket, so the quota
+    holds across processes; concurrency windows stay per process.
+    """
+
+    def __init__(self):
+        self.limiters: Dict[str, UpstreamLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> UpstreamLimiter:
+        with self._lock:
+            limiter = self.limiters.get(name)
+            if limiter is None:
+                prefix = name.upper()
+                bucket_factory = TokenBucket
+                if Config.WORKERS > 1:
+                    bucket_factory = functools.partial(SharedTokenBucket, Config.SHARED_CACHE_PATH, name)
+                limiter = self.limiters[name] = UpstreamLimiter(
+                    name,
+                    rate=getattr(Config, f"{prefix}_RATE_LIMIT"),
+                    max_concurrency=getattr(Config, f"{prefix}_CONCURRENCY"),
+                    max_retries=Config.UPSTREAM_MAX_RETRIES,
+                    bucket_factory=bucket_factory
+                )
+            return limiter
+
+    def call(self, name: str, func, *args, **kwargs):
+        return self.get(name).call(func, *args, **kwargs)
+
+    def chat_model_kwargs(self, name: str) -> Dict:
+        """rate_limiter and callbacks to pass to a LangChain chat model"""
+        limiter = self.get(name)
+        return {
+            "rate_limiter": LangChainRateLimiter(limiter),
+            "callbacks": [LimiterFeedback(limiter)],
+        }
+
+limiters = LimiterRegistry()
+
+
+class LangChainRateLimiter(BaseRateLimiter):
+    """Adapter so LangChain chat models wait on an UpstreamLimiter before each call
+
+    LangChain has no release hook, so only the token bucket and Retry-After
+    pauses apply; LimiterFeedback reports the outcome.
+    """
+
+    def __init__(self, limiter: UpstreamLimiter):
+        self.limiter = limiter
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self.limiter.wait_time()
+            if wait <= 0:
+                return True
+            if not blocking:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self.limiter.wait_time()
+            if wait <= 0:
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(wait)
+
+
+class LimiterFeedback(BaseCallbackHandler):
+    """Report chat model successes and 429/5xx errors back to the limiter"""
+
+    def __init__(self, limiter: UpstreamLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response, **kwargs):
+        self.limiter.observe()
+
+    def on_llm_error(self, error: BaseException, **kwargs):
+        self.limiter.observe(*response_status(error), error=True)
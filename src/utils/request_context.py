@@ -0,0 +1,125 @@
+import contextvars
+import functools
+import json
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from src.utils.telemetry import registry
+
+tool_memo = registry.counter(
+    "jarvis_tool_memo_total", "Memoizable tool calls per request, by tool and hit/miss"
+)
+request_duplicates = registry.histogram(
+    "jarvis_request_duplicate_tool_calls", "Repeated tool calls per request served from the memo",
+    buckets=(0, 1, 2, 5, 10, 25)
+)
+
+
+class RequestContext:
+    """State shared by every agent while one user request is handled
+
+    Holds the results of idempotent tool calls keyed by tool name and
+    arguments. Concurrent identical calls wait for the first one instead of
+    going upstream twice.
+    """
+
+    def __init__(self):
+        self.results: Dict[tuple, Future] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def call(self, tool: str, key: str, func):
+        with self._lock:
+            future = self.results.get((tool, key))
+            owner = future is None
+            if owner:
+                future = self.results[(tool, key)] = Future()
+                self.misses[tool] = self.misses.get(tool, 0) + 1
+            else:
+                self.hits[tool] = self.hits.get(tool, 0) + 1
+        tool_memo.inc(tool=tool, result="miss" if owner else "hit")
+        if not owner:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            self._forget(tool, key, future)
+            future.set_exception(e)
+            raise
+        # Tools report failures as "Error ..." strings; let the next call retry
+        if isinstance(result, str) and result.startswith("Error"):
+            self._forget(tool, key, future)
+        future.set_result(result)
+        return result
+
+    def _forget(self, tool: str, key: str, future: Future):
+        with self._lock:
+            if self.results.get((tool, key)) is future:
+                del self.results[(tool, key)]
+
+    def invalidate(self, tools: Iterable[str]):
+        tools = set(tools)
+        with self._lock:
+            for cached in [cached for cached in self.results if cached[0] in tools]:
+                del self.results[cached]
+
+    @property
+    def duplicates(self) -> int:
+        """Calls answered from this request's memo instead of upstream"""
+        return sum(self.hits.values())
+
+
+_current_request: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar(
+    "jarvis_request", default=None
+)
+
+def current_request() -> Optional[RequestContext]:
+    return _current_request.get()
+
+@contextmanager
+def request_scope():
+    """Start a request context, reusing the enclosing one if already inside a request"""
+    context = _current_request.get()
+    if context is not None:
+        yield context
+        return
+    context = RequestContext()
+    token = _current_request.set(context)
+    try:
+        yield context
+    finally:
+        _current_request.reset(token)
+        request_duplicates.observe(context.duplicates)
+
+def _call_key(args, kwargs) -> str:
+    return json.dumps([args, kwargs], sort_keys=True, default=str)
+
+def memoize_in_request(tool: str):
+    """Cache a read-only method's result per request by its arguments (self excluded)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            context = _current_request.get()
+            if context is None:
+                return func(self, *args, **kwargs)
+            return context.call(tool, _call_key(args, kwargs), lambda: func(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+def invalidates(*tools: str):
+    """Mark a mutating method: it always runs and drops memoized results of `tools`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = _current_request.get()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if context is not None:
+                    context.invalidate(tools)
+        return wrapper
+    return decorator
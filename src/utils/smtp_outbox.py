@@ -0,0 +1,358 @@
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from email.message import Message
+from email.utils import make_msgid
+from typing import Dict, List, Optional
+from src.utils.telemetry import span
+
+def _is_connection_error(error: Exception) -> bool:
+    """True if the SMTP session is unusable (SMTPException subclasses OSError)"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class SMTPConnectionPool:
+    """Small pool of authenticated SMTP connections
+
+    Idle connections are closed after `idle_timeout` seconds, and a NOOP
+    health check is run before handing out a connection that sat idle.
+    """
+
+    # Swappable for a local stand-in, e.g. in benchmarks
+    smtp_factory = smtplib.SMTP
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None,
+                 use_tls: bool = True, size: int = 2, idle_timeout: float = 60.0,
+                 timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: List = []  # (connection, released_at)
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def _connect(self) -> smtplib.SMTP:
+        with span("smtp.connect"):
+            server = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._quietly_close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _quietly_close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_healthy(server) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def acquire(self) -> smtplib.SMTP:
+        """Get a live connection, reusing an idle one when possible"""
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    self._cond.wait()
+                if self._idle:
+                    server, released_at = self._idle.pop()
+                else:
+                    self._open += 1
+                    break
+            # The connection is ours now; check it without blocking other callers
+            if time.monotonic() - released_at <= self.idle_timeout and self._is_healthy(server):
+                return server
+            self.release(server, broken=True)
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, server, broken: bool = False):
+        """Return a connection to the pool, discarding it if broken"""
+        with self._cond:
+            if broken:
+                self._open -= 1
+            else:
+                self._idle.append((server, time.monotonic()))
+            self._cond.notify()
+        if broken:
+            self._quietly_close(server)
+
+    @contextmanager
+    def connection(self):
+        server = self.acquire()
+        try:
+            yield server
+        except Exception as e:
+            # Protocol-level errors leave the session usable
+            self.release(server, broken=_is_connection_error(e))
+            raise
+        else:
+            self.release(server)
+
+    def prune(self):
+        """Close connections that have been idle longer than idle_timeout"""
+        with self._cond:
+            now = time.monotonic()
+            expired = [server for server, released_at in self._idle if now - released_at > self.idle_timeout]
+            self._idle = [(server, released_at) for server, released_at in self._idle
+                          if now - released_at <= self.idle_timeout]
+            self._open -= len(expired)
+            self._cond.notify(len(expired))
+        for server in expired:
+            self._quietly_close(server)
+
+    def close(self):
+        with self._cond:
+            for server, _ in self._idle:
+                self._quietly_close(server)
+            self._open -= len(self._idle)
+            self._idle = []
+
+
+class Outbox:
+    """Asynchronous email delivery over a pooled SMTP connection set
+
+    enqueue() returns a message ID immediately; worker threads deliver the
+    message, retrying transient failures with exponential backoff. Status of
+    sent or failed messages is kept for `status_ttl` seconds, and for at most
+    `max_finished` messages. close() delivers what is still queued, retries
+    included, before stopping the workers; call it on shutdown.
+    """
+
+    # Permanent SMTP failures that a retry cannot fix, besides any 5xx reply
+    PERMANENT_ERRORS = (
+        smtplib.SMTPRecipientsRefused,
+        smtplib.SMTPSenderRefused,
+        smtplib.SMTPAuthenticationError,
+        smtplib.SMTPNotSupportedError,
+    )
+
+    def __init__(self, pool: SMTPConnectionPool, workers: int = 2, max_attempts: int = 3,
+                 backoff: float = 2.0, status_ttl: float = 3600.0, max_finished: int = 10000):
+        self.pool = pool
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.status_ttl = status_ttl
+        self.max_finished = max_finished
+        self._queue: "queue.Queue" = queue.Queue()
+        self._status: Dict[str, Dict] = {}
+        self._finished: "OrderedDict[str, float]" = OrderedDict()  # message_id -> finished_at
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        # Retries waiting out their backoff: (due, sequence, (message_id, msg))
+        self._delayed: List = []
+        self._sequence = itertools.count()
+        self._closing = False
+        self._stopped = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"smtp-outbox-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def enqueue(self, msg: Message) -> str:
+        """Queue a message for delivery and return its message ID"""
+        if not msg['Message-ID']:
+            msg['Message-ID'] = make_msgid()
+        message_id = msg['Message-ID']
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("Outbox is closed")
+            self._evict()
+            self._finished.pop(message_id, None)
+            self._status[message_id] = {
+                'status': 'queued',
+                'to': msg['To'],
+                'attempts': 0,
+                'error': None,
+            }
+            self._pending += 1
+        self._queue.put((message_id, msg))
+        return message_id
+
+    def send_batch(self, messages: List[Message]) -> List[Dict]:
+        """Send several messages back to back over a single SMTP session
+        
+        Blocks until done and returns one status dict per message, in order.
+        A dropped connection is re-established and the remaining messages
+        resumed, up to max_attempts times. The message being sent when the
+        connection dropped may have been delivered, so it is not resent and
+        its status is 'unknown'.
+        """
+        ids, entries = [], []
+        with self._lock:
+            self._evict()
+        for msg in messages:
+            if not msg['Message-ID']:
+                msg['Message-ID'] = make_msgid()
+            ids.append(msg['Message-ID'])
+            entry = {'status': 'sending', 'to': msg['To'], 'attempts': 0, 'error': None}
+            entries.append(entry)
+            with self._lock:
+                self._finished.pop(msg['Message-ID'], None)
+                self._status[msg['Message-ID']] = entry
+        
+        position, reconnects = 0, 0
+        while position < len(messages):
+            try:
+                with self.pool.connection() as server:
+                    while position < len(messages):
+                        message_id = ids[position]
+                        with self._lock:
+                            self._status[message_id]['attempts'] += 1
+                        try:
+                            with span("smtp.send"):
+                                server.send_message(messages[position])
+                        except Exception as e:
+                            if _is_connection_error(e):
+                                self._update(message_id, status='unknown',
+                                             error=f"connection lost while sending, may have been delivered: {e}")
+                                position += 1
+                                raise
+                            self._update(message_id, status='failed', error=str(e))
+                        else:
+                            self._update(message_id, status='sent')
+                        position += 1
+            except Exception as e:
+                reconnects += 1
+                if reconnects >= self.max_attempts:
+                    for message_id in ids[position:]:
+                        self._update(message_id, status='failed', error=str(e))
+                    break
+        
+        with self._lock:
+            return [dict(entry, message_id=message_id) for message_id, entry in zip(ids, entries)]
+    
+    def status(self, message_id: str) -> Optional[Dict]:
+        """Delivery status for a message, or None if unknown"""
+        with self._lock:
+            status = self._status.get(message_id)
+            return dict(status) if status else None
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued message is sent or has failed"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: float = 30.0) -> bool:
+        """Stop accepting mail, deliver what is queued, then stop the workers
+
+        Retries are sent without waiting out their backoff. Returns False if
+        messages were still undelivered after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._closing = True
+        for _ in self._workers:
+            self._queue.put(None)  # wake workers so they pick up delayed retries
+        drained = self.flush(timeout)
+        self._stopped = True
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        if not drained:
+            print(f"Outbox closed with {self._pending} message(s) undelivered")
+        return drained
+
+    def _update(self, message_id: str, **fields):
+        with self._lock:
+            self._status[message_id].update(fields)
+            if fields.get('status') in ('sent', 'failed', 'unknown'):
+                self._finished[message_id] = time.monotonic()
+
+    def _evict(self):
+        """Drop expired or excess finished statuses; call with self._lock held"""
+        cutoff = time.monotonic() - self.status_ttl
+        while self._finished:
+            message_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[message_id]
+            self._status.pop(message_id, None)
+
+    def _finish(self, message_id: str, **fields):
+        with self._lock:
+            self._status[message_id].update(fields)
+            self._finished[message_id] = time.monotonic()
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _is_permanent(self, error: Exception) -> bool:
+        if isinstance(error, self.PERMANENT_ERRORS):
+            return True
+        return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+    def _next(self):
+        """Next (message_id, msg) to deliver, or None to re-check state"""
+        with self._lock:
+            now = time.monotonic()
+            # Backoff is skipped once closing, so shutdown isn't held up by it
+            while self._delayed and (self._closing or self._delayed[0][0] <= now):
+                self._queue.put(heapq.heappop(self._delayed)[2])
+            wait = self.pool.idle_timeout
+            if self._delayed:
+                wait = min(wait, self._delayed[0][0] - now)
+        return self._queue.get(timeout=wait)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._next()
+            except queue.Empty:
+                self.pool.prune()
+                continue
+            if item is None:
+                if self._stopped:
+                    return
+                continue
+            message_id, msg = item
+            attempts = self._status[message_id]['attempts'] + 1
+            self._update(message_id, status='sending', attempts=attempts)
+            try:
+                with self.pool.connection() as server:
+                    with span("smtp.send"):
+                        server.send_message(msg)
+            except Exception as e:
+                if self._is_permanent(e) or attempts >= self.max_attempts:
+                    self._finish(message_id, status='failed', error=str(e))
+                else:
+                    delay = self.backoff * (2 ** (attempts - 1))
+                    self._update(message_id, status='retrying', error=str(e))
+                    with self._lock:
+                        heapq.heappush(
+                            self._delayed, (time.monotonic() + delay, next(self._sequence), (message_id, msg))
+                        )
+            else:
+                self._finish(message_id, status='sent', error=None)
@@ -0,0 +1,143 @@
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, Optional
+
+from src.utils.telemetry import registry, span
+
+speculations = registry.counter(
+    "jarvis_speculation_total", "Speculative prefetches by predicted agent and outcome"
+)
+speculation_saved = registry.counter(
+    "jarvis_speculation_saved_seconds_total", "Prefetch time overlapped with routing on hits"
+)
+
+# Cheap keyword predictor for the router's decision; the first agent with
+# the most keyword matches wins
+AGENT_KEYWORDS = {
+    "calendar": ("calendar", "meeting", "meetings", "schedule", "event", "events", "appointment",
+                 "agenda", "busy", "free"),
+    "email": ("email", "e-mail", "mail", "send", "write to", "reply"),
+    "contact": ("contact", "phone", "number", "address", "who is"),
+    "expense": ("spend", "spent", "spending", "expense", "expenses", "transaction", "transactions",
+                "cost", "bought", "budget", "purchase", "credit card"),
+}
+
+def predict_agent(query: str) -> Optional[str]:
+    """Most likely agent for a query, or None when nothing matches"""
+    lowered = query.lower()
+    scores = {}
+    for agent, keywords in AGENT_KEYWORDS.items():
+        score = sum(1 for keyword in keywords if re.search(rf"\b{re.escape(keyword)}\b", lowered))
+        if score:
+            scores[agent] = score
+    if not scores:
+        return None
+    return max(scores, key=scores.get)
+
+
+class Speculation:
+    """A prefetch started for the predicted agent while the router runs
+
+    `cancelled` is set on a miss; prefetchers check it before each upstream
+    call so a wrong guess stops spending quota as soon as the router decides.
+    """
+
+    def __init__(self, speculator: "Speculator", agent: Optional[str], future: Optional[Future]):
+        self.speculator = speculator
+        self.agent = agent
+        self.future = future
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def _done(self, future: Future):
+        self.finished = time.perf_counter()
+
+    def resolve(self, routed_to: str, timeout: float = 2.0) -> bool:
+        """Commit the prefetch if the router agreed, otherwise cancel it
+
+        On a hit a prefetch that has not started yet is dropped, and a
+        running one is given at most `timeout` seconds to finish; after
+        that the agent goes ahead and the request memo joins any identical
+        call still in flight.
+        """
+        decided = time.perf_counter()
+        if self.future is None:
+            self.speculator.record(self.agent, "none")
+            return False
+        if routed_to != self.agent:
+            self.cancelled.set()
+            self.future.cancel()
+            self.speculator.record(self.agent, "miss")
+            return False
+        if self.future.cancel():
+            self.speculator.record(self.agent, "late")
+            return False
+        try:
+            self.future.result(timeout)
+        except TimeoutError:
+            self.speculator.record(self.agent, "late")
+            return False
+        except Exception:
+            self.speculator.record(self.agent, "error")
+            return False
+        finished = self.finished or time.perf_counter()
+        self.speculator.record(self.agent, "hit", saved=min(finished, decided) - self.started)
+        return True
+
+
+class Speculator:
+    """Runs read-only prefetches for the agent a local predictor expects
+
+    prefetchers maps agent names to callables taking the user query and
+    the speculation's `cancelled` event. Work runs in the caller's context,
+    so the request memo and trace are shared.
+    """
+
+    def __init__(self, prefetchers: Dict[str, Callable[[str, threading.Event], object]], max_workers: int = 2,
+                 predictor: Callable[[str], Optional[str]] = predict_agent):
+        self.prefetchers = prefetchers
+        self.predictor = predictor
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self.outcomes: Dict[str, int] = {"hit": 0, "miss": 0, "late": 0, "none": 0, "error": 0}
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, query: str) -> Speculation:
+        agent = self.predictor(query)
+        prefetch = self.prefetchers.get(agent)
+        if prefetch is None:
+            return Speculation(self, agent, None)
+        speculation = Speculation(self, agent, None)
+        context = contextvars.copy_context()
+        future = self.executor.submit(context.run, self._run, agent, prefetch, query, speculation.cancelled)
+        speculation.future = future
+        future.add_done_callback(speculation._done)
+        return speculation
+
+    @staticmethod
+    def _run(agent: str, prefetch, query: str, cancelled: threading.Event):
+        if cancelled.is_set():
+            return None
+        with span(f"speculation.{agent}"):
+            return prefetch(query, cancelled)
+
+    def record(self, agent: Optional[str], outcome: str, saved: float = 0.0):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.saved_seconds += saved
+        speculations.inc(agent=agent or "none", outcome=outcome)
+        if saved:
+            speculation_saved.inc(saved, agent=agent)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            predicted = sum(self.outcomes[outcome] for outcome in ("hit", "miss", "late", "error"))
+            return {
+                **self.outcomes,
+                "hit_rate": self.outcomes["hit"] / predicted if predicted else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
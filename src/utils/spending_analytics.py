@@ -0,0 +1,262 @@
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.transaction_store import TransactionStore, parse_date
+
+_MONTHS = {name.lower(): index for index, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): index for index, name in enumerate(calendar.month_abbr) if name})
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+def _quarter_start(day: date) -> date:
+    return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+
+def _latest_quarter_start(quarter: int, today: date) -> date:
+    """Start of the most recent occurrence of quarter (1-4)"""
+    start = date(today.year, 3 * (quarter - 1) + 1, 1)
+    return start if start <= today else date(today.year - 1, start.month, 1)
+
+def parse_time_period(text: str, today: date = None) -> Tuple[Optional[date], Optional[date]]:
+    """Turn a natural time period into an inclusive (start, end) date range
+
+    Understands phrases such as "this month", "last quarter", "past week",
+    "last 2 quarters", "March", "March 2024", "Q1", "Q2 2024", "2023",
+    "last 30 days", "year to date", "last weekend", "since March",
+    "January to March" and explicit "2024-01-01 to 2024-02-15" ranges.
+    Returns (None, None) for an empty period or "all time", and raises
+    ValueError for anything else it does not recognise.
+    """
+    today = today or date.today()
+    original = text
+    text = " ".join((text or "").lower().replace(",", " ").split())
+    text = re.sub(r"^(?:the|in|during|over|for) ", "", text)
+    text = re.sub(r"^this past ", "past ", text)
+    if not text or text in ("all", "all time", "ever"):
+        return None, None
+
+    if text == "today":
+        return today, today
+    if text == "yesterday":
+        return today - timedelta(days=1), today - timedelta(days=1)
+
+    match = re.fullmatch(r"(?:from |between )?(.+?) (?:to|until|through|and|-) (.+)", text)
+    if match:
+        try:
+            start, _ = parse_time_period(match.group(1), today)
+            _, end = parse_time_period(match.group(2), today)
+        except ValueError:
+            start = end = None
+        if start and end:
+            if start > end and not re.search(r"\d{4}", match.group(1)):
+                # "November to February": the start month is in the previous year
+                start = _add_months(start, -12)
+            return start, end
+
+    match = re.fullmatch(r"(?:since|from|after) (.+)", text)
+    if match:
+        start, _ = parse_time_period(match.group(1), today)
+        return start, today
+    match = re.fullmatch(r"(?:until|through|before|up to) (.+)", text)
+    if match:
+        _, end = parse_time_period(match.group(1), today)
+        return None, end
+
+    explicit = parse_date(text)
+    if explicit:
+        return explicit, explicit
+
+    # Rolling windows ending today: "past week", "last 30 days", "past 2 months"
+    match = re.fullmatch(r"(?:(?:last|previous) (\d+)|past(?: (\d+))?) (day|week|month|quarter|year)s?", text)
+    if match:
+        count, unit = int(match.group(1) or match.group(2) or 1), match.group(3)
+        if unit == "quarter" and match.group(1):
+            # "last 2 quarters": the complete quarters before this one
+            end = _quarter_start(today) - timedelta(days=1)
+            return _add_months(_quarter_start(today), -3 * count), end
+        if unit == "day":
+            return today - timedelta(days=count - 1), today
+        if unit == "week":
+            return today - timedelta(weeks=count) + timedelta(days=1), today
+        if unit in ("month", "quarter"):
+            months = count * (3 if unit == "quarter" else 1)
+            return _add_months(today, -months) + timedelta(days=1), today
+        return _add_months(today, -12 * count) + timedelta(days=1), today
+
+    week_start = today - timedelta(days=today.weekday())
+    if text == "this week":
+        return week_start, today
+    if text in ("last week", "previous week"):
+        return week_start - timedelta(days=7), week_start - timedelta(days=1)
+    if text in ("this weekend", "weekend"):
+        saturday = week_start + timedelta(days=5)
+        if today < saturday:
+            return saturday - timedelta(days=7), saturday - timedelta(days=6)
+        return saturday, today
+    if text in ("last weekend", "previous weekend", "past weekend"):
+        return week_start - timedelta(days=2), week_start - timedelta(days=1)
+
+    if text == "this month":
+        return _month_start(today), today
+    if text in ("last month", "previous month"):
+        last = _add_months(_month_start(today), -1)
+        return last, _month_end(last)
+
+    if text == "this quarter":
+        return _quarter_start(today), today
+    if text in ("last quarter", "previous quarter"):
+        start = _add_months(_quarter_start(today), -3)
+        return start, _add_months(start, 3) - timedelta(days=1)
+
+    if text in ("this year", "ytd", "year to date"):
+        return date(today.year, 1, 1), today
+    if text in ("last year", "previous year"):
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+
+    match = re.fullmatch(r"q([1-4])(?: (?:of )?(\d{4}))?|(\d{4}) q([1-4])", text)
+    if match:
+        quarter = int(match.group(1) or match.group(4))
+        year = match.group(2) or match.group(3)
+        start = date(int(year), 3 * (quarter - 1) + 1, 1) if year else _latest_quarter_start(quarter, today)
+        return start, _add_months(start, 3) - timedelta(days=1)
+
+    match = re.fullmatch(r"(\d{4})", text)
+    if match:
+        year = int(match.group(1))
+        return date(year, 1, 1), date(year, 12, 31)
+
+    match = re.fullmatch(r"(\d{4})-(\d{1,2})", text)
+    if match:
+        start = date(int(match.group(1)), int(match.group(2)), 1)
+        return start, _month_end(start)
+
+    match = re.fullmatch(r"([a-z]+)(?: (?:of )?(\d{4}))?", text)
+    if match and match.group(1) in _MONTHS:
+        month = _MONTHS[match.group(1)]
+        if match.group(2):
+            year = int(match.group(2))
+        else:
+            # A bare month name means its most recent occurrence
+            year = today.year if month <= today.month else today.year - 1
+        start = date(year, month, 1)
+        return start, _month_end(start)
+
+    raise ValueError(f"unrecognised time period: {original!r}")
+
+
+class SpendingAnalytics:
+    """Spending aggregates over a TransactionStore
+
+    Whole months are answered from the store's month x category x merchant
+    rollups; only partial months at the edges of a range touch the raw
+    transactions, through the date index.
+    """
+
+    def __init__(self, store: TransactionStore):
+        self.store = store
+
+    def _segments(self, start: Optional[date], end: Optional[date]) -> List[Tuple[str, tuple]]:
+        """Split a range into raw-row edges and a block of whole months"""
+        if start is None and end is None:
+            return [("rollup", (None, None))]
+        if start is None or end is None:
+            return [("raw", (start, end))]
+        first_full = start if start.day == 1 else _add_months(_month_start(start), 1)
+        last_full = end if end == _month_end(end) else _month_start(end) - timedelta(days=1)
+        if first_full > last_full:
+            return [("raw", (start, end))]
+        segments = []
+        if start < first_full:
+            segments.append(("raw", (start, first_full - timedelta(days=1))))
+        segments.append(("rollup", (first_full.isoformat()[:7], last_full.isoformat()[:7])))
+        if last_full < end:
+            segments.append(("raw", (last_full + timedelta(days=1), end)))
+        return segments
+
+    def _grouped(self, group_by: str, start, end, category: str = "") -> Dict[str, Tuple[float, int]]:
+        """SUM(amount), COUNT(*) grouped by "month", "merchant" or "category" """
+        results: Dict[str, list] = {}
+        for kind, (low, high) in self._segments(start, end):
+            clauses, args = [], []
+            if kind == "rollup":
+                key = group_by
+                table, amount, count = "monthly_rollups", "SUM(total)", "SUM(count)"
+                if low:
+                    clauses.append("month BETWEEN ? AND ?")
+                    args.extend([low, high])
+            else:
+                key = "substr(date, 1, 7)" if group_by == "month" else group_by
+                table, amount, count = "transactions", "SUM(amount)", "COUNT(*)"
+                clauses.append("date IS NOT NULL")
+                if low:
+                    clauses.append("date >= ?")
+                    args.append(low.isoformat())
+                if high:
+                    clauses.append("date <= ?")
+                    args.append(high.isoformat())
+            if category:
+                # Same exact, case-insensitive match as the vector and lexical category_key filters
+                clauses.append("LOWER(TRIM(category)) = ?")
+                args.append(category.strip().lower())
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            query = f"SELECT {key} AS grp, {amount} AS total, {count} AS n FROM {table} {where} GROUP BY grp"
+            for row in self.store.query(query, args):
+                entry = results.setdefault(row["grp"], [0.0, 0])
+                entry[0] += row["total"] or 0.0
+                entry[1] += row["n"] or 0
+        return {group: (total, count) for group, (total, count) in results.items()}
+
+    @staticmethod
+    def _month_range(months: List[str], start: Optional[date], end: Optional[date]) -> List[str]:
+        """Every YYYY-MM from start (or the first month with data) to end, capped at today"""
+        if not months and not (start and end):
+            return months
+        first = _month_start(start) if start else date.fromisoformat(f"{months[0]}-01")
+        last = _month_start(min(end, date.today())) if end else date.fromisoformat(f"{months[-1]}-01")
+        if months:
+            last = max(last, date.fromisoformat(f"{months[-1]}-01"))
+        result = []
+        while first <= last:
+            result.append(first.strftime("%Y-%m"))
+            first = _add_months(first, 1)
+        return result
+
+    def summary(self, category: str = "", start: date = None, end: date = None,
+                top_n: int = 5) -> Dict:
+        """Totals, average, top merchants and month-over-month changes"""
+        by_month = self._grouped("month", start, end, category)
+        by_merchant = self._grouped("merchant", start, end, category)
+
+        total = sum(value for value, _ in by_month.values())
+        count = sum(n for _, n in by_month.values())
+        monthly = []
+        previous = None
+        for month in self._month_range(sorted(by_month), start, end):
+            # Months without transactions count as zero spending
+            value = by_month.get(month, (0.0, 0))[0]
+            delta = None if previous is None else value - previous
+            percent = None if not previous else 100.0 * delta / previous
+            monthly.append({"month": month, "total": value, "delta": delta, "percent": percent})
+            previous = value
+
+        top_merchants = sorted(by_merchant.items(), key=lambda item: item[1][0], reverse=True)[:top_n]
+        return {
+            "total": total,
+            "count": count,
+            "average": total / count if count else 0.0,
+            "top_merchants": [
+                {"merchant": merchant, "total": value, "count": n}
+                for merchant, (value, n) in top_merchants
+            ],
+            "monthly": monthly,
+        }
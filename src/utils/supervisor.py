@@ -0,0 +1,157 @@
+import asyncio
+import multiprocessing
+import signal
+import threading
+import time
+from typing import List, Optional
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from src.config import Config
+from src.utils.telemetry import configure_slow_log, registry, start_metrics_server
+
+updates_dispatched = registry.counter(
+    "jarvis_updates_dispatched_total", "Telegram updates routed to each worker process"
+)
+worker_restarts = registry.counter(
+    "jarvis_worker_restarts_total", "Worker processes restarted after exiting unexpectedly"
+)
+
+def shard_for(update: Update, workers: int) -> int:
+    """Worker index for an update; every update from one chat goes to the same worker"""
+    chat = update.effective_chat
+    key = chat.id if chat is not None else update.update_id
+    return key % workers
+
+def _worker_main(index: int, queue):
+    """Entry point of a worker process: handle updates from its queue in order
+
+    Upstream rate budgets are shared through SharedTokenBucket rows in
+    SHARED_CACHE_PATH, so any worker can use the full quota.
+    """
+    if Config.SLOW_REQUEST_LOG:
+        configure_slow_log(Config.SLOW_REQUEST_LOG)
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_PORT + 1 + index)
+
+    # Ctrl+C reaches the whole process group; the supervisor's sentinel stops us instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from src.utils.telegram_handler import TelegramHandler
+    handler = TelegramHandler()
+    if index == 0:
+        handler.start_background_jobs()
+    try:
+        asyncio.run(_consume(handler.app, queue))
+    finally:
+        handler.close()
+
+async def _consume(app: Application, queue):
+    loop = asyncio.get_running_loop()
+    async with app:
+        while True:
+            payload = await loop.run_in_executor(None, queue.get)
+            if payload is None:
+                break
+            # Awaiting each update before taking the next keeps per-chat ordering
+            await app.process_update(Update.de_json(payload, app.bot))
+
+
+class Supervisor:
+    """Polls Telegram and fans updates out to worker processes sharded by chat_id
+
+    Only the supervisor talks to getUpdates; workers build the full
+    TelegramHandler and process the updates they are given. A worker that
+    exits is restarted on the same queue, so updates already routed to it
+    are not lost. On shutdown each worker finishes the updates already
+    queued for it and delivers its queued emails before exiting.
+    """
+
+    def __init__(self, workers: int, restart_delay: float = 1.0, max_restart_delay: float = 30.0):
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        # spawn: workers must not inherit the supervisor's threads or sockets
+        self.ctx = multiprocessing.get_context("spawn")
+        self.queues = [self.ctx.Queue() for _ in range(workers)]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self._failures = [0] * workers
+        self._stopping = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+        self.app = (
+            Application.builder()
+            .token(Config.TELEGRAM_BOT_TOKEN)
+            .post_init(self._start_workers)
+            .post_shutdown(self._stop_workers)
+            .build()
+        )
+        self.app.add_handler(TypeHandler(Update, self.dispatch))
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        index = shard_for(update, self.workers)
+        self.queues[index].put(update.to_dict())
+        updates_dispatched.inc(worker=index)
+
+    def _spawn(self, index: int):
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(index, self.queues[index]),
+            name=f"jarvis-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+        print(f"Worker {index} started (pid {process.pid})")
+
+    def _watch(self):
+        """Restart exited workers, backing off while one keeps crashing"""
+        next_start = [0.0] * self.workers
+        while not self._stopping.wait(0.5):
+            for index, process in enumerate(self.processes):
+                if process is None or process.is_alive():
+                    continue
+                if next_start[index] == 0.0:
+                    print(f"Worker {index} exited with code {process.exitcode}")
+                    delay = min(self.restart_delay * 2 ** self._failures[index], self.max_restart_delay)
+                    next_start[index] = time.monotonic() + delay
+                    self._failures[index] += 1
+                elif time.monotonic() >= next_start[index]:
+                    next_start[index] = 0.0
+                    worker_restarts.inc(worker=index)
+                    self._spawn(index)
+                    # A worker that survives a minute is considered healthy again
+                    timer = threading.Timer(60, self._reset_failures, (index, self.processes[index]))
+                    timer.daemon = True
+                    timer.start()
+
+    def _reset_failures(self, index: int, process):
+        if process.is_alive() and self.processes[index] is process:
+            self._failures[index] = 0
+
+    async def _start_workers(self, app: Application):
+        for index in range(self.workers):
+            self._spawn(index)
+        self._monitor = threading.Thread(target=self._watch, name="worker-monitor", daemon=True)
+        self._monitor.start()
+
+    async def _stop_workers(self, app: Application):
+        self._stopping.set()
+        for queue in self.queues:
+            queue.put(None)
+        await asyncio.to_thread(self._join_workers, Config.SHUTDOWN_TIMEOUT + 10.0)
+
+    def _join_workers(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        for index, process in enumerate(self.processes):
+            if process is not None:
+                process.join(max(0.0, deadline - time.monotonic()))
+                if process.is_alive():
+                    print(f"Worker {index} did not stop in time; terminating")
+                    process.terminate()
+
+    def run(self):
+        """Start the workers and poll Telegram until interrupted"""
+        print(f"JARVIS supervisor online with {self.workers} workers...")
+        self.app.run_polling()
@@ -1,4 +1,5 @@
 
+import asyncio
 from telegram import Update
 from telegram.ext import Application, MessageHandler, filters, ContextTypes
 import os
@@ -7,6 +8,7 @@ from src.agents.assistant_agent import AssistantAgent
 from src.agents.jarvis_personality import JarvisPersonality
 from src.utils.voice_handler import VoiceHandler
 from src.utils.text_to_speech import TextToSpeechHandler
+from src.utils.telemetry import record_bytes, span, trace_request
 
 class TelegramHandler:
     def __init__(self):
@@ -15,7 +17,12 @@ class TelegramHandler:
         self.voice_handler = VoiceHandler()
         self.tts_handler = TextToSpeechHandler()
         
-        self.app = Application.builder().token(Config.TELEGRAM_BOT_TOKEN).build()
+        self.app = (
+            Application.builder()
+            .token(Config.TELEGRAM_BOT_TOKEN)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         
         # Add handlers
         self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text))
@@ -23,73 +30,77 @@ class TelegramHandler:
     
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages"""
-        user_message = update.message.text
-        
-        # Process through assistant agent
-        agent_response = self.assistant.run(user_message)
-        
-        # Add JARVIS personality
-        jarvis_response = self.jarvis_personality.generate_response(agent_response)
-        
-        # Convert to speech and send audio
-        try:
-            audio_bytes = self.tts_handler.convert_text_to_speech(jarvis_response)
+        with trace_request("telegram.text"):
+            user_message = update.message.text
+            record_bytes("telegram.text", "in", len(user_message.encode("utf-8")))
             
-            # Save temporarily
-            audio_path = f"temp_audio_{update.message.message_id}.mp3"
-            with open(audio_path, "wb") as f:
-                f.write(audio_bytes)
-            
-            # Send audio file
-            await update.message.reply_voice(voice=open(audio_path, "rb"))
-            
-            # Clean up
-            os.remove(audio_path)
-        except Exception as e:
-            print(f"TTS Error: {e}")
-            # Fallback to text response if voice fails
-            await update.message.reply_text(jarvis_response)
+            await self._respond(update, user_message)
     
     async def handle_voice(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle voice messages"""
-        # Download voice file
-        voice_file = await update.message.voice.get_file()
-        voice_path = f"temp_voice_{update.message.message_id}.ogg"
-        await voice_file.download_to_drive(voice_path)
-        
-        # Transcribe
-        transcribed_text = self.voice_handler.transcribe_audio(voice_path)
-        
-        # Clean up voice file
-        os.remove(voice_path)
-        
-        if not transcribed_text:
-            await update.message.reply_text("Sorry, I couldn't understand the audio.")
-            return
-        
+        with trace_request("telegram.voice"):
+            # Download voice file
+            voice_path = f"temp_voice_{update.message.message_id}.ogg"
+            with span("telegram.download"):
+                voice_file = await update.message.voice.get_file()
+                await voice_file.download_to_drive(voice_path)
+            record_bytes("telegram.voice", "in", os.path.getsize(voice_path))
+            
+            # Transcribe
+            with span("stt"):
+                transcribed_text = await asyncio.to_thread(self.voice_handler.transcribe_audio, voice_path)
+            
+            # Clean up voice file
+            os.remove(voice_path)
+            
+            if not transcribed_text:
+                await update.message.reply_text("Sorry, I couldn't understand the audio.")
+                return
+            
+            await self._respond(update, transcribed_text)
+    
+    async def _respond(self, update: Update, query: str):
+        """Run the assistant and reply with JARVIS's voice, falling back to text"""
         # Process through assistant agent
-        agent_response = self.assistant.run(transcribed_text)
+        with span("assistant"):
+            agent_response = await self.assistant.arun(query)
         
         # Add JARVIS personality
-        jarvis_response = self.jarvis_personality.generate_response(agent_response)
+        with span("personality"):
+            jarvis_response = await asyncio.to_thread(self.jarvis_personality.generate_response, agent_response)
         
         # Convert to speech and send audio
         try:
-            audio_bytes = self.tts_handler.convert_text_to_speech(jarvis_response)
-            
-            audio_path = f"temp_audio_{update.message.message_id}.mp3"
-            with open(audio_path, "wb") as f:
-                f.write(audio_bytes)
-            
-            await update.message.reply_voice(voice=open(audio_path, "rb"))
+            with span("tts"):
+                audio_bytes, audio_format = await asyncio.to_thread(self.tts_handler.voice_note, jarvis_response)
             
-            os.remove(audio_path)
+            # Send from memory; Ogg/Opus shows up as a proper voice note with a waveform
+            with span("telegram.upload"):
+                await update.message.reply_voice(
+                    voice=audio_bytes,
+                    filename=f"jarvis_{update.message.message_id}.{audio_format}"
+                )
+            record_bytes("telegram.voice", "out", len(audio_bytes))
         except Exception as e:
             print(f"TTS Error: {e}")
             # Fallback to text response if voice fails
             await update.message.reply_text(jarvis_response)
+            record_bytes("telegram.text", "out", len(jarvis_response.encode("utf-8")))
+    
+    def close(self):
+        """Deliver queued work before the process exits"""
+        self.assistant.close(Config.SHUTDOWN_TIMEOUT)
+    
+    async def _post_shutdown(self, app: Application):
+        await asyncio.to_thread(self.close)
+    
+    def start_background_jobs(self):
+        """Periodic work that should run in exactly one process"""
+        if Config.INGEST_INTERVAL > 0:
+            self.assistant.expense_agent.start_ingestion(Config.INGEST_INTERVAL)
     
     def run(self):
         """Start the bot"""
+        self.start_background_jobs()
         print("JARVIS is online...")
         self.app.run_polling()
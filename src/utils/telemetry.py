@@ -0,0 +1,279 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from src.config import Config
+
+slow_log = logging.getLogger("jarvis.slow")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    rendered = []
+    for name, value in pairs:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        rendered.append(f'{name}="{value}"')
+    return "{" + ",".join(rendered) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + value
+
+    def get(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[_label_key(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple, list] = {}  # key -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self.series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (buckets, total, count) in sorted(self.series.items()):
+                for bound, bucket_count in zip(self.buckets, buckets):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', str(bound)),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        with self._lock:
+            return self.metrics.setdefault(name, Counter(name, help))
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        with self._lock:
+            return self.metrics.setdefault(name, Gauge(name, help))
+
+    def histogram(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+stage_latency = registry.histogram(
+    "jarvis_stage_latency_seconds", "Latency of each pipeline stage"
+)
+stage_errors = registry.counter(
+    "jarvis_stage_errors_total", "Exceptions raised per pipeline stage"
+)
+request_latency = registry.histogram(
+    "jarvis_request_latency_seconds", "End-to-end latency per request type"
+)
+llm_tokens = registry.counter(
+    "jarvis_llm_tokens_total", "LLM tokens used per stage and direction"
+)
+io_bytes = registry.counter(
+    "jarvis_bytes_total", "Payload bytes per stage and direction"
+)
+
+
+class Trace:
+    """Spans recorded while handling one request"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> str:
+        lines = []
+        for span in sorted(self.spans, key=lambda s: s['offset']):
+            line = f"{'  ' * span['depth']}{span['name']}: {span['duration'] * 1000:.1f}ms (+{span['offset'] * 1000:.1f}ms)"
+            if span['error']:
+                line += f" ERROR {span['error']}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("jarvis_trace", default=None)
+_span_depth: contextvars.ContextVar[int] = contextvars.ContextVar("jarvis_span_depth", default=0)
+
+_trace_listeners: List = []
+
+def add_trace_listener(listener):
+    """Call listener(trace, total_seconds) whenever a request trace completes"""
+    _trace_listeners.append(listener)
+
+def remove_trace_listener(listener):
+    if listener in _trace_listeners:
+        _trace_listeners.remove(listener)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str):
+    """Time a pipeline stage, recording it in the latency histogram and current trace"""
+    trace = _current_trace.get()
+    depth = _span_depth.get()
+    token = _span_depth.set(depth + 1)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        stage_errors.inc(stage=name)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        _span_depth.reset(token)
+        stage_latency.observe(duration, stage=name)
+        if trace is not None:
+            trace.add({
+                'name': name,
+                'offset': started - trace.started,
+                'duration': duration,
+                'depth': depth,
+                'error': error,
+            })
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def trace_request(name: str):
+    """Root span for one request; slow requests are logged with every stage"""
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    depth_token = _span_depth.set(0)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        _span_depth.reset(depth_token)
+        _current_trace.reset(trace_token)
+        total = time.perf_counter() - trace.started
+        request_latency.observe(total, request=name)
+        if total >= Config.SLOW_REQUEST_SECONDS:
+            slow_log.warning("Slow request %s took %.2fs\n%s", name, total, trace.breakdown())
+        for listener in list(_trace_listeners):
+            listener(trace, total)
+
+def configure_slow_log(path: str):
+    """Append slow-request breakdowns to a file"""
+    slow_log.addHandler(logging.FileHandler(path))
+    slow_log.setLevel(logging.WARNING)
+
+def record_llm_usage(stage: str, *messages):
+    """Add token counts from LangChain messages' usage_metadata"""
+    for message in messages:
+        usage = getattr(message, 'usage_metadata', None) or {}
+        if usage.get('input_tokens'):
+            llm_tokens.inc(usage['input_tokens'], stage=stage, direction="input")
+        if usage.get('output_tokens'):
+            llm_tokens.inc(usage['output_tokens'], stage=stage, direction="output")
+
+def record_bytes(stage: str, direction: str, size: int):
+    io_bytes.inc(size, stage=stage, direction=direction)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve Prometheus text-format metrics at http://host:port/metrics"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -1,25 +1,88 @@
 import requests
 import json
+import time
+from typing import Tuple
 from src.config import Config
+from src.utils.audio_transcoder import OpusTranscoder, is_ogg_opus
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import record_bytes, span
 
 class TextToSpeechHandler:
     def __init__(self):
         self.api_key = Config.ELEVENLABS_API_KEY
         self.voice_id = Config.ELEVENLABS_VOICE_ID
         self.base_url = "https://api.elevenlabs.io/v1"
+        self.output_format = Config.TTS_OUTPUT_FORMAT
+        self.native_opus = self.output_format.startswith("opus")
+        # While ElevenLabs rejects or ignores the Opus format, skip asking until this time
+        self.native_opus_retry_at = 0.0
+        self.native_opus_cooldown = Config.TTS_OPUS_RETRY_SECONDS
+        self.transcoder = OpusTranscoder(
+            workers=Config.TTS_TRANSCODE_WORKERS,
+            bitrate=Config.TTS_OPUS_BITRATE
+        )
     
-    def convert_text_to_speech(self, text: str) -> bytes:
+    def convert_text_to_speech(self, text: str, output_format: str = None) -> bytes:
         """
         Convert text to speech using ElevenLabs
         Equivalent to n8n's HTTP Request node for TTS
         """
+        response = self._request(text, output_format)
+        if response.status_code == 200:
+            return response.content
+        else:
+            raise Exception(f"TTS API error: {response.status_code} - {response.text}")
+    
+    def voice_note(self, text: str) -> Tuple[bytes, str]:
+        """Speech for a Telegram voice note as (audio, "ogg") or (audio, "mp3")
+
+        Ogg/Opus is requested from ElevenLabs directly; if the plan or API
+        doesn't provide it, MP3 is transcoded in the worker pool for the
+        next native_opus_cooldown seconds, then Opus is tried again. MP3 is
+        only returned if transcoding fails.
+        """
+        audio = None
+        if self.native_opus and time.monotonic() >= self.native_opus_retry_at:
+            response = self._request(text, self.output_format)
+            if response.status_code == 200 and is_ogg_opus(response.content):
+                return response.content, "ogg"
+            if not self._opus_unsupported(response):
+                raise Exception(f"TTS API error: {response.status_code} - {response.text}")
+            print(f"ElevenLabs did not return Opus ({response.status_code}), "
+                  f"transcoding MP3 for the next {self.native_opus_cooldown:.0f}s")
+            self.native_opus_retry_at = time.monotonic() + self.native_opus_cooldown
+            if response.status_code == 200:
+                audio = response.content
+        
+        if audio is None:
+            audio = self.convert_text_to_speech(text)
+        try:
+            return self.transcoder.to_opus(audio), "ogg"
+        except Exception as e:
+            print(f"Opus transcode failed, sending MP3: {e}")
+            return audio, "mp3"
+    
+    @staticmethod
+    def _opus_unsupported(response) -> bool:
+        """True if the response shows the Opus output format itself isn't available"""
+        if response.status_code == 200:
+            # Format ignored and the default MP3 returned
+            return True
+        if response.status_code not in (400, 403, 422):
+            return False
+        # Errors about the text, voice or quota must not switch formats
+        body = (response.text or "").lower()
+        return "output_format" in body or "opus" in body
+    
+    def _request(self, text: str, output_format: str = None):
         url = f"{self.base_url}/text-to-speech/{self.voice_id}"
         
         headers = {
-            "Accept": "audio/mpeg",
+            "Accept": "audio/ogg" if output_format and output_format.startswith("opus") else "audio/mpeg",
             "Content-Type": "application/json",
             "xi-api-key": self.api_key
         }
+        params = {"output_format": output_format} if output_format else None
         
         # Clean the text to ensure valid JSON
         cleaned_text = self._clean_text_for_json(text)
@@ -33,12 +96,13 @@ class TextToSpeechHandler:
             }
         }
         
-        response = requests.post(url, json=data, headers=headers)
-        
-        if response.status_code == 200:
-            return response.content
-        else:
-            raise Exception(f"TTS API error: {response.status_code} - {response.text}")
+        with span("tts.elevenlabs"):
+            # Throttled (429/5xx) responses are retried by the limiter
+            response = limiters.call(
+                "elevenlabs", requests.post, url, params=params, json=data, headers=headers
+            )
+        record_bytes("tts.elevenlabs", "in", len(response.content or b""))
+        return response
     
     def _clean_text_for_json(self, text: str) -> str:
         """
@@ -0,0 +1,358 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import gspread
+from google.oauth2.service_account import Credentials
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import span
+
+SHEETS_SCOPES = ['https://spreadsheets.google.com/feeds',
+                 'https://www.googleapis.com/auth/drive']
+
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%b %d, %Y",
+                 "%B %d, %Y", "%d %b %Y", "%d %B %Y", "%Y-%m-%dT%H:%M:%S")
+
+def parse_date(value) -> Optional[date]:
+    """Parse the date formats commonly found in bank exports"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value or "").strip()
+    if not text:
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text).date()
+    except ValueError:
+        return None
+
+def parse_amount(value) -> float:
+    """Parse amounts such as "$1,234.50" or "(12.00)" """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").strip().replace("$", "").replace(",", "")
+    if not text:
+        return 0.0
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+def _column_letter(index: int) -> str:
+    """1 -> A, 27 -> AA"""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class SheetsClient:
+    """Long-lived Google Sheets client for the transactions worksheet"""
+
+    def __init__(self, credentials_path: str, sheet_name: str):
+        self.credentials_path = credentials_path
+        self.sheet_name = sheet_name
+        self._worksheet = None
+        self._lock = threading.Lock()
+
+    @property
+    def worksheet(self):
+        with self._lock:
+            if self._worksheet is None:
+                creds = Credentials.from_service_account_file(
+                    self.credentials_path,
+                    scopes=SHEETS_SCOPES
+                )
+                client = gspread.authorize(creds)
+                self._worksheet = client.open(self.sheet_name).sheet1
+            return self._worksheet
+
+    def header(self) -> List[str]:
+        with span("sheets.header"):
+            return limiters.call("sheets", self.worksheet.row_values, 1)
+
+    def read_rows(self, start_row: int, num_columns: int, chunk_size: int = 500):
+        """Yield (row_number, values) from start_row to the end of the sheet"""
+        last_column = _column_letter(max(num_columns, 1))
+        row = start_row
+        while True:
+            end_row = row + chunk_size - 1
+            with span("sheets.read"):
+                values = limiters.call("sheets", self.worksheet.get_values, f"A{row}:{last_column}{end_row}")
+            for offset, value in enumerate(values):
+                yield row + offset, value
+            if len(values) < chunk_size:
+                return
+            row = end_row + 1
+
+
+class TransactionStore:
+    """Local SQLite copy of the transactions sheet, indexed by date
+
+    sync() fetches only rows after the last one already stored. Background
+    jobs call sync(full=True), which every full_sync_interval seconds
+    re-reads the whole sheet instead and reconciles edited, inserted and
+    deleted rows; when that changes rows already synced, revision() goes up
+    so readers can rebuild what they derived from the old rows.
+    """
+
+    def __init__(self, db_path: str, sheets_client: SheetsClient = None,
+                 sync_interval: float = 60.0, full_sync_interval: float = 3600.0):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.sheets_client = sheets_client
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+        self._last_sync = 0.0
+        self._last_full_sync = None  # the first full sync after start-up reconciles everything
+        self._lock = threading.RLock()
+        # Serialises sheet fetches; _lock is only held while writing
+        self._sync_lock = threading.Lock()
+        # Worker processes share the file, so wait on locks and let readers run during writes
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                row INTEGER PRIMARY KEY,
+                date TEXT,
+                description TEXT,
+                merchant TEXT,
+                category TEXT,
+                amount REAL NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+            CREATE TABLE IF NOT EXISTS monthly_rollups (
+                month TEXT,
+                category TEXT,
+                merchant TEXT,
+                total REAL NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (month, category, merchant)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        has_rollups = self.conn.execute("SELECT 1 FROM monthly_rollups LIMIT 1").fetchone()
+        has_rows = self.conn.execute("SELECT 1 FROM transactions LIMIT 1").fetchone()
+        if has_rows and not has_rollups:
+            with self.conn:
+                self._refresh_rollups(None)
+
+    def _refresh_rollups(self, months):
+        """Recompute month x category x merchant totals for the given months (None = all)"""
+        if months is None:
+            self.conn.execute("DELETE FROM monthly_rollups")
+            where, args = "WHERE date IS NOT NULL", []
+        else:
+            months = sorted(months)
+            if not months:
+                return
+            placeholders = ", ".join("?" for _ in months)
+            self.conn.execute(
+                f"DELETE FROM monthly_rollups WHERE month IN ({placeholders})", months
+            )
+            # Range predicates on date let SQLite use the date index
+            clauses = " OR ".join("(date >= ? AND date < ?)" for _ in months)
+            where = f"WHERE {clauses}"
+            args = []
+            for month in months:
+                args.extend([f"{month}-01", f"{month}-32"])
+        self.conn.execute(
+            f"""INSERT INTO monthly_rollups (month, category, merchant, total, count)
+                SELECT substr(date, 1, 7), category, merchant, SUM(amount), COUNT(*)
+                FROM transactions {where}
+                GROUP BY substr(date, 1, 7), category, merchant""",
+            args
+        )
+
+    def get_state(self, key: str, default: str = None) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (key,)
+            ).fetchone()
+            return row['value'] if row else default
+
+    def set_state(self, key: str, value):
+        self.set_states({key: value})
+
+    def set_states(self, values: Dict):
+        """Write several sync_state keys in one transaction"""
+        with self._lock, self.conn:
+            self._write_states(values)
+
+    def _write_states(self, values: Dict):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+
+    def last_row(self) -> int:
+        """Sheet row number of the last synced transaction (1 is the header)"""
+        return int(self.get_state('last_row', '1'))
+
+    def revision(self) -> int:
+        """Bumped whenever rows that were already synced change or disappear"""
+        return int(self.get_state('revision', '0'))
+
+    def add_rows(self, rows: List[Dict], last_row: int = None):
+        """Insert transactions keyed by sheet row number"""
+        with self._lock, self.conn:
+            self._write_rows(rows, last_row)
+
+    def _write_rows(self, rows: List[Dict], last_row: int = None):
+        """add_rows without committing, for use inside a larger transaction"""
+        # Months touched by these rows, including months of rows being replaced
+        months = {row['date'][:7] for row in rows if row['date']}
+        row_numbers = [row['row'] for row in rows]
+        for i in range(0, len(row_numbers), 500):
+            chunk = row_numbers[i:i + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            months.update(
+                existing['date'][:7] for existing in self.conn.execute(
+                    f"SELECT date FROM transactions WHERE date IS NOT NULL AND row IN ({placeholders})",
+                    chunk
+                )
+            )
+        self.conn.executemany(
+            """INSERT OR REPLACE INTO transactions
+               (row, date, description, merchant, category, amount)
+               VALUES (:row, :date, :description, :merchant, :category, :amount)""",
+            rows
+        )
+        self._refresh_rollups(months)
+        if last_row is not None:
+            self._write_states({'last_row': last_row})
+
+    @staticmethod
+    def _to_row(row_number: int, record: Dict) -> Dict:
+        parsed = parse_date(record.get('Date'))
+        description = str(record.get('Description', '') or '')
+        return {
+            'row': row_number,
+            'date': parsed.isoformat() if parsed else None,
+            'description': description,
+            'merchant': str(record.get('Merchant', '') or description),
+            'category': str(record.get('Category', '') or ''),
+            'amount': parse_amount(record.get('Amount')),
+        }
+
+    def reconcile(self, rows: List[Dict], last_row: int) -> int:
+        """Make the store match a full read of the sheet; returns rows changed
+
+        Row changes, rollups and the revision bump commit together.
+        """
+        with self._lock, self.conn:
+            previous_last_row = self.last_row()
+            existing = {
+                row['row']: dict(row) for row in self.conn.execute("SELECT * FROM transactions")
+            }
+            changed = [row for row in rows if existing.get(row['row']) != row]
+            current = {row['row'] for row in rows}
+            removed = [number for number in existing if number not in current]
+
+            months = {existing[number]['date'][:7] for number in removed if existing[number]['date']}
+            for i in range(0, len(removed), 500):
+                chunk = removed[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                self.conn.execute(f"DELETE FROM transactions WHERE row IN ({placeholders})", chunk)
+            self._refresh_rollups(months)
+            # _write_rows refreshes the rollups of the changed rows' months
+            self._write_rows(changed, last_row=last_row)
+
+            if removed or any(row['row'] <= previous_last_row for row in changed):
+                self._write_states({'revision': self.revision() + 1})
+            return len(changed) + len(removed)
+
+    def sync(self, force: bool = False, full: bool = False) -> int:
+        """Pull rows appended to the sheet since the last sync
+
+        Calls within sync_interval of the previous sync are skipped unless
+        forced. With full=True the whole sheet is re-read and reconciled
+        when full_sync_interval has passed since the last full read; keep
+        that to background jobs, as it reads every row. Returns the number
+        of transactions stored or removed.
+        """
+        if self.sheets_client is None:
+            return 0
+        with self._sync_lock:
+            now = time.monotonic()
+            if not force and now - self._last_sync < self.sync_interval:
+                return 0
+            full = full and (
+                self._last_full_sync is None or now - self._last_full_sync >= self.full_sync_interval
+            )
+            header = self.sheets_client.header()
+            start_row = 2 if full else self.last_row() + 1
+            rows, last_row = [], start_row - 1
+            for row_number, values in self.sheets_client.read_rows(start_row, len(header)):
+                last_row = row_number
+                if not any(values):
+                    continue
+                rows.append(self._to_row(row_number, dict(zip(header, values))))
+            if full:
+                count = self.reconcile(rows, last_row)
+                self._last_full_sync = time.monotonic()
+            else:
+                count = len(rows)
+                if last_row >= start_row:
+                    self.add_rows(rows, last_row=last_row)
+            self._last_sync = time.monotonic()
+            return count
+
+    def query(self, sql: str, args=()) -> List[sqlite3.Row]:
+        """Run a read-only query against the store's tables"""
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def rows_after(self, row: int, limit: int = 500) -> List[Dict]:
+        """Transactions in sheet order starting after the given row number"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "SELECT * FROM transactions WHERE row > ? ORDER BY row LIMIT ?",
+                (row, limit)
+            )
+            return [dict(row) for row in cursor]
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        """Most recent transactions first"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "SELECT * FROM transactions ORDER BY date DESC, row DESC LIMIT ?",
+                (limit,)
+            )
+            return [dict(row) for row in cursor]
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None,
+                limit: int = None) -> List[Dict]:
+        """Transactions dated within [start, end], most recent first"""
+        clauses, args = [], []
+        if start:
+            clauses.append("date >= ?")
+            args.append(start.isoformat())
+        if end:
+            clauses.append("date <= ?")
+            args.append(end.isoformat())
+        query = "SELECT * FROM transactions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY date DESC, row DESC"
+        if limit:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(query, args)]
@@ -0,0 +1,166 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def get_many(self, keys: Iterable) -> Tuple[Dict[Any, Any], List]:
+        """Split keys into (cached hits, misses)"""
+        hits, misses = {}, []
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                misses.append(key)
+            else:
+                hits[key] = value
+        return hits, misses
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one key, or the whole cache when key is None"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drop every key for which predicate(key) is true"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedTTLCache:
+    """TTLCache backed by a SQLite file so several processes share entries
+
+    Keys and values are pickled; entries live in one namespace per cache.
+    Expired rows are skipped on read and purged on write. maxsize is
+    enforced by dropping the oldest entries.
+    """
+
+    def __init__(self, db_path: str, namespace: str, maxsize: int = 256, ttl: float = 300.0):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT,
+                    key BLOB,
+                    expires_at REAL,
+                    value BLOB,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+
+    @staticmethod
+    def _dump(obj) -> bytes:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key, default=None):
+        hits, _ = self.get_many([key])
+        return hits.get(key, default)
+
+    def get_many(self, keys: Iterable) -> Tuple[Dict[Any, Any], List]:
+        """Split keys into (cached hits, misses) with one query"""
+        keys = list(keys)
+        hits = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = {self._dump(key): key for key in keys[i:i + 500]}
+                placeholders = ", ".join("?" for _ in chunk)
+                for blob, value in self.conn.execute(
+                    f"SELECT key, value FROM cache WHERE namespace = ? AND expires_at >= ? "
+                    f"AND key IN ({placeholders})",
+                    [self.namespace, time.time(), *chunk]
+                ):
+                    hits[chunk[blob]] = pickle.loads(value)
+        return hits, [key for key in keys if key not in hits]
+
+    def set(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, expires_at, value) VALUES (?, ?, ?, ?)",
+                (self.namespace, self._dump(key), time.time() + self.ttl, self._dump(value))
+            )
+            self.conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND (expires_at < ? OR key NOT IN "
+                "(SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at DESC LIMIT ?))",
+                (self.namespace, time.time(), self.namespace, self.maxsize)
+            )
+
+    def invalidate(self, key=None):
+        with self._lock, self.conn:
+            if key is None:
+                self.conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+            else:
+                self.conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, self._dump(key))
+                )
+
+    def invalidate_where(self, predicate):
+        with self._lock, self.conn:
+            blobs = [
+                (self.namespace, blob)
+                for (blob,) in self.conn.execute(
+                    "SELECT key FROM cache WHERE namespace = ?", (self.namespace,)
+                )
+                if predicate(pickle.loads(blob))
+            ]
+            self.conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", blobs)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires_at >= ?",
+                (self.namespace, time.time())
+            ).fetchone()[0]
@@ -0,0 +1,406 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils.transaction_store import parse_date
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import span, traced
+
+def filter_metadata(row: Dict) -> Dict:
+    """Metadata fields used for filtering, derived from a transaction"""
+    parsed = parse_date(row.get('date'))
+    return {
+        'date_ordinal': parsed.toordinal() if parsed else 0,
+        'category_key': (row.get('category') or '').strip().lower(),
+    }
+
+
+class VectorStore(ABC):
+    """Interface shared by the vector index backends
+
+    Filters are dicts with any of start_date, end_date (date or ISO
+    string), category, min_amount and max_amount.
+    """
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict]):
+        """Insert or replace {'id', 'values', 'metadata'} records"""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Remove records by ID; unknown IDs are ignored"""
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int = 5, filter: Optional[Dict] = None) -> List[Dict]:
+        """Return up to top_k {'id', 'score', 'metadata'} matches, best first"""
+
+    @staticmethod
+    def _filter_bounds(filter: Optional[Dict]) -> Dict:
+        filter = filter or {}
+        start = parse_date(filter.get('start_date'))
+        end = parse_date(filter.get('end_date'))
+        return {
+            'start': start.toordinal() if start else None,
+            'end': end.toordinal() if end else None,
+            'category': (filter.get('category') or '').strip().lower() or None,
+            'min_amount': filter.get('min_amount'),
+            'max_amount': filter.get('max_amount'),
+        }
+
+
+class PineconeVectorStore(VectorStore):
+    """Pinecone index behind the VectorStore interface"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors: List[Dict]):
+        with span("pinecone.upsert"):
+            limiters.call("pinecone", self.index.upsert, vectors=vectors)
+
+    def delete(self, ids: List[str]):
+        if not ids:
+            return
+        with span("pinecone.delete"):
+            limiters.call("pinecone", self.index.delete, ids=ids)
+
+    def query(self, vector, top_k=5, filter=None):
+        bounds = self._filter_bounds(filter)
+        conditions = {}
+        date_range = {}
+        if bounds['start'] is not None:
+            date_range['$gte'] = bounds['start']
+        if bounds['end'] is not None:
+            date_range['$lte'] = bounds['end']
+        if date_range:
+            conditions['date_ordinal'] = date_range
+        if bounds['category']:
+            conditions['category_key'] = {'$eq': bounds['category']}
+        amount_range = {}
+        if bounds['min_amount'] is not None:
+            amount_range['$gte'] = float(bounds['min_amount'])
+        if bounds['max_amount'] is not None:
+            amount_range['$lte'] = float(bounds['max_amount'])
+        if amount_range:
+            conditions['amount'] = amount_range
+
+        kwargs = {'vector': vector, 'top_k': top_k, 'include_metadata': True}
+        if conditions:
+            kwargs['filter'] = conditions
+        with span("pinecone.query"):
+            results = limiters.call("pinecone", self.index.query, **kwargs)
+        return [
+            {'id': match['id'], 'score': match['score'], 'metadata': match['metadata']}
+            for match in results['matches']
+        ]
+
+
+class LocalVectorStore(VectorStore):
+    """Offline vector index over a memory-mapped float32 matrix
+
+    Vectors are L2-normalised so scores are cosine similarities. Metadata
+    filters are applied as NumPy masks over columnar arrays before scoring.
+    Candidate sets (after filtering) smaller than ivf_threshold are searched
+    exactly; larger ones are narrowed by an inverted-file (k-means
+    partitions) index to the nprobe closest partitions, probing further
+    partitions when a filter leaves too few candidates in them. The
+    partitions are rebuilt each time the store grows past another multiple
+    of ivf_threshold.
+
+    metadata.jsonl is an append-only log of upserts and deletion
+    tombstones. Deleted vectors keep their matrix row and are masked out
+    of queries. One process writes; the others pick up appended records
+    on their next query, so worker processes see what the ingesting one
+    adds.
+    """
+
+    def __init__(self, path: str, ivf_threshold: int = 50000, nprobe: int = 8):
+        self.path = path
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._matrix_path = os.path.join(path, "vectors.f32")
+        self._meta_path = os.path.join(path, "metadata.jsonl")
+        self.dim = 0
+        self.count = 0
+        self._capacity = 0
+        self._matrix = None
+        self.ids: List[str] = []
+        self.metadata: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._meta_size = 0  # bytes of metadata.jsonl applied so far
+        self._centroids = None
+        self._assignments = None
+        self._ivf_count = 0  # vectors stored when the partitions were built
+        # Columnar copies of the filterable metadata
+        self._date = np.zeros(0, dtype=np.int64)
+        self._amount = np.zeros(0, dtype=np.float64)
+        self._category = np.zeros(0, dtype=object)
+        self._live = np.zeros(0, dtype=bool)
+        self._deleted = 0
+        self._load()
+
+    # -- storage -----------------------------------------------------------
+
+    def _load(self):
+        """Apply records appended to metadata.jsonl since the last load"""
+        try:
+            size = os.path.getsize(self._meta_path)
+        except FileNotFoundError:
+            return
+        if size == self._meta_size:
+            return
+        positions = []
+        with open(self._meta_path, "rb") as f:
+            f.seek(self._meta_size)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # the writer is mid-append; pick it up next time
+                self._meta_size += len(line)
+                record = json.loads(line)
+                if 'dim' in record:
+                    self.dim = record['dim']
+                    continue
+                # A later line for an ID replaces the earlier one
+                position = self._positions.get(record['id'])
+                if position is None:
+                    position = self._positions[record['id']] = len(self.ids)
+                    self.ids.append(record['id'])
+                    self.metadata.append(None)
+                self.metadata[position] = None if record.get('deleted') else record['metadata']
+                positions.append(position)
+        self.count = len(self.ids)
+        if self.dim and os.path.exists(self._matrix_path):
+            capacity = os.path.getsize(self._matrix_path) // (self.dim * 4)
+            if capacity != self._capacity:
+                self._capacity = capacity
+                self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode='r+',
+                                         shape=(self._capacity, self.dim))
+        self._set_columns(positions)
+        if self._centroids is not None and positions:
+            self._assign(positions, self._matrix[positions])
+
+    def _append_metadata(self, records: List[Dict]):
+        is_new = not os.path.exists(self._meta_path)
+        with open(self._meta_path, "a") as f:
+            if is_new:
+                f.write(json.dumps({'dim': self.dim}) + "\n")
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        # Single writer: everything up to here is already applied in memory
+        self._meta_size = os.path.getsize(self._meta_path)
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(1024, self._capacity)
+        while capacity < needed:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode='r+',
+                                 shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    def _set_columns(self, positions):
+        """Grow the filter columns to count and refresh the given rows"""
+        if len(self._date) < self.count:
+            grow = self.count - len(self._date)
+            self._date = np.concatenate([self._date, np.zeros(grow, dtype=np.int64)])
+            self._amount = np.concatenate([self._amount, np.zeros(grow, dtype=np.float64)])
+            self._category = np.concatenate([self._category, np.full(grow, '', dtype=object)])
+            self._live = np.concatenate([self._live, np.zeros(grow, dtype=bool)])
+        for position in positions:
+            metadata = self.metadata[position]
+            self._live[position] = metadata is not None
+            if metadata is None:
+                continue
+            self._date[position] = metadata.get('date_ordinal', 0)
+            self._amount[position] = float(metadata.get('amount') or 0)
+            self._category[position] = metadata.get('category_key', '')
+        self._deleted = self.count - int(np.count_nonzero(self._live[:self.count]))
+
+    # -- VectorStore -------------------------------------------------------
+
+    def upsert(self, vectors: List[Dict]):
+        if not vectors:
+            return
+        with self._lock:
+            self._load()
+            if not self.dim:
+                self.dim = len(vectors[0]['values'])
+            values = np.asarray([v['values'] for v in vectors], dtype=np.float32)
+            norms = np.linalg.norm(values, axis=1, keepdims=True)
+            values /= np.where(norms == 0, 1, norms)
+
+            positions = []
+            for record in vectors:
+                metadata = dict(record.get('metadata', {}))
+                if 'date_ordinal' not in metadata:
+                    metadata.update(filter_metadata(metadata))
+                position = self._positions.get(record['id'])
+                if position is None:
+                    position = len(self.ids)
+                    self._positions[record['id']] = position
+                    self.ids.append(record['id'])
+                    self.metadata.append(metadata)
+                else:
+                    self.metadata[position] = metadata
+                positions.append(position)
+
+            self.count = len(self.ids)
+            self._ensure_capacity(self.count)
+            self._matrix[positions] = values
+            self._matrix.flush()
+            self._set_columns(positions)
+            if self._centroids is not None:
+                self._assign(positions, values)
+            self._append_metadata(
+                [{'id': self.ids[position], 'metadata': self.metadata[position]} for position in positions]
+            )
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._load()
+            positions = [
+                self._positions[id] for id in dict.fromkeys(ids)
+                if id in self._positions and self.metadata[self._positions[id]] is not None
+            ]
+            if not positions:
+                return
+            for position in positions:
+                self.metadata[position] = None
+            self._set_columns(positions)
+            self._append_metadata([{'id': self.ids[position], 'deleted': True} for position in positions])
+
+    def _assign(self, positions: List[int], values: np.ndarray):
+        """Put vectors at positions into their nearest partition"""
+        assignments = np.resize(self._assignments, self.count)
+        assignments[positions] = np.argmax(values @ self._centroids.T, axis=1)
+        self._assignments = assignments
+
+    def _mask(self, filter: Optional[Dict]) -> Optional[np.ndarray]:
+        bounds = self._filter_bounds(filter)
+        mask = self._live.copy() if self._deleted else None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if bounds['start'] is not None:
+            narrow(self._date >= bounds['start'])
+        if bounds['end'] is not None:
+            narrow(self._date <= bounds['end'])
+        if bounds['category']:
+            narrow(self._category == bounds['category'])
+        if bounds['min_amount'] is not None:
+            narrow(self._amount >= float(bounds['min_amount']))
+        if bounds['max_amount'] is not None:
+            narrow(self._amount <= float(bounds['max_amount']))
+        return mask
+
+    def _top_k(self, query: np.ndarray, candidates: np.ndarray, top_k: int) -> List[Dict]:
+        if candidates.size == 0:
+            return []
+        scores = self._matrix[candidates] @ query
+        k = min(top_k, candidates.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {'id': self.ids[candidates[i]], 'score': float(scores[i]),
+             'metadata': self.metadata[candidates[i]]}
+            for i in best
+        ]
+
+    def _normalise(self, vector) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    @traced("local_vectors.query")
+    def query(self, vector, top_k=5, filter=None, exact: bool = None):
+        with self._lock:
+            self._load()
+            if not self.count:
+                return []
+            query = self._normalise(vector)
+            mask = self._mask(filter)
+            candidates = np.arange(self.count) if mask is None else np.flatnonzero(mask)
+            if exact is None:
+                # A selective filter leaves few rows, most outside the probed partitions
+                exact = candidates.size < self.ivf_threshold
+            if not exact:
+                candidates = self._probe(query, candidates, top_k)
+            return self._top_k(query, candidates, top_k)
+
+    def _probe(self, query: np.ndarray, candidates: np.ndarray, top_k: int) -> np.ndarray:
+        """Candidates in the partitions closest to query, widening past nprobe
+        until they cover the share of candidates nprobe covers unfiltered"""
+        self._ensure_ivf()
+        order = np.argsort(-(self._centroids @ query))
+        assignments = self._assignments[candidates]
+        share = min(1.0, self.nprobe / len(order))
+        wanted = min(candidates.size, max(top_k * 10, int(candidates.size * share)))
+        nprobe = self.nprobe
+        while True:
+            selected = candidates[np.isin(assignments, order[:nprobe])]
+            if selected.size >= wanted or nprobe >= len(order):
+                return selected
+            nprobe *= 2
+
+    # -- approximate index -------------------------------------------------
+
+    def _ensure_ivf(self, iterations: int = 10, sample_size: int = 20000):
+        if self._centroids is not None and (
+            self.count // self.ivf_threshold <= self._ivf_count // self.ivf_threshold
+        ):
+            return
+        n_lists = max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(0)
+        sample = self._matrix[rng.choice(self.count, min(sample_size, self.count), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(n_lists):
+                members = sample[labels == i]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[i] = centroid / norm if norm else centroid
+        assignments = np.empty(self.count, dtype=np.int64)
+        for start in range(0, self.count, 50000):
+            block = self._matrix[start:min(start + 50000, self.count)]
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._assignments = assignments
+        self._ivf_count = self.count
+
+    def benchmark(self, queries: List[List[float]], top_k: int = 5, filter: Optional[Dict] = None) -> Dict:
+        """Compare the approximate search against brute force
+
+        Returns mean recall@top_k and median latencies in milliseconds.
+        """
+        recalls, exact_ms, approx_ms = [], [], []
+        for vector in queries:
+            started = time.perf_counter()
+            truth = {m['id'] for m in self.query(vector, top_k, filter, exact=True)}
+            exact_ms.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            found = {m['id'] for m in self.query(vector, top_k, filter, exact=False)}
+            approx_ms.append((time.perf_counter() - started) * 1000)
+            recalls.append(len(truth & found) / len(truth) if truth else 1.0)
+        return {
+            'queries': len(queries),
+            'recall': float(np.mean(recalls)) if recalls else 0.0,
+            'exact_ms_p50': float(np.median(exact_ms)) if exact_ms else 0.0,
+            'approx_ms_p50': float(np.median(approx_ms)) if approx_ms else 0.0,
+        }
@@ -2,6 +2,8 @@ import speech_recognition as sr
 from pydub import AudioSegment
 import io
 import os
+from src.utils.rate_limit import limiters
+from src.utils.telemetry import span
 
 class VoiceHandler:
     def __init__(self):
@@ -14,15 +16,17 @@ class VoiceHandler:
         """
         try:
             # Convert audio to WAV format if needed
-            audio = AudioSegment.from_file(audio_file_path)
-            wav_io = io.BytesIO()
-            audio.export(wav_io, format="wav")
-            wav_io.seek(0)
+            with span("stt.decode"):
+                audio = AudioSegment.from_file(audio_file_path)
+                wav_io = io.BytesIO()
+                audio.export(wav_io, format="wav")
+                wav_io.seek(0)
             
             # Transcribe
             with sr.AudioFile(wav_io) as source:
                 audio_data = self.recognizer.record(source)
-                text = self.recognizer.recognize_google(audio_data)
+                with span("stt.recognize"):
+                    text = limiters.call("stt", self.recognizer.recognize_google, audio_data)
                 return text
         except Exception as e:
             print(f"Transcription error: {e}")
@@ -0,0 +1,51 @@
+import copy
+import json
+import os
+
+from benchmarks import harness, run
+
+BASELINE = os.path.join(os.path.dirname(harness.__file__), "baseline.json")
+
+
+def load_baseline():
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+def test_baseline_matches_itself():
+    baseline = load_baseline()
+    assert harness.compare(baseline, baseline) == []
+
+
+def test_compare_flags_regressions():
+    baseline = load_baseline()
+    report = copy.deepcopy(baseline)
+    report["end_to_end"]["p95_ms"] *= 1.5
+    report["throughput_rps"] *= 0.5
+    report["errors"] = baseline["errors"] + 1
+
+    regressions = harness.compare(report, baseline)
+
+    assert any(r.startswith("end-to-end p95_ms") for r in regressions)
+    assert any(r.startswith("throughput") for r in regressions)
+    assert any(r.startswith("errors") for r in regressions)
+
+
+def test_compare_ignores_millisecond_noise():
+    baseline = {"end_to_end": {"p50_ms": 100, "p95_ms": 100, "p99_ms": 100},
+                "stages": {"telegram.download": {"p95_ms": 1.0}},
+                "throughput_rps": 1.0, "peak_memory_mb": 1.0, "errors": 0}
+    report = copy.deepcopy(baseline)
+    report["stages"]["telegram.download"]["p95_ms"] = 3.0
+
+    assert harness.compare(report, baseline) == []
+
+
+def test_run_exits_non_zero_on_regression(tmp_path):
+    baseline = load_baseline()
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        baseline["end_to_end"][key] = 1.0
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline))
+
+    assert run.main(["--requests", "4", "--rate", "20", "--baseline", str(path)]) == 1
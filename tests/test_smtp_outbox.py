@@ -0,0 +1,173 @@
+import socket
+import socketserver
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+from src.utils.smtp_outbox import Outbox, SMTPConnectionPool
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail from smtplib"""
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.sockets.append(self.request)
+        self.reply("220 localhost ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with server.lock:
+                    reply = server.data_replies.pop(0) if server.data_replies else "250 Queued"
+                    if reply.startswith("250") or reply == "drop":
+                        server.messages += 1
+                if reply == "drop":
+                    return  # accepted, but the connection dies before the reply
+                self.reply(reply)
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+    def reply(self, text: str):
+        self.wfile.write(f"{text}\r\n".encode())
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.sockets = []
+        # Replies to the next DATA commands; "drop" closes the connection instead
+        self.data_replies = []
+
+    def drop_connections(self):
+        """Close every open session from the server side"""
+        with self.lock:
+            sockets, self.sockets = self.sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool(smtp_server):
+    host, port = smtp_server.server_address
+    pool = SMTPConnectionPool(host, port, use_tls=False, size=1, timeout=5)
+    yield pool
+    pool.close()
+
+
+def message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg['From'] = "jarvis@example.com"
+    msg['To'] = to
+    msg['Subject'] = "Test"
+    msg.set_content("Hello")
+    return msg
+
+
+def test_messages_reuse_pooled_connection(smtp_server, pool):
+    outbox = Outbox(pool, workers=1, backoff=0.01)
+
+    results = outbox.send_batch([message("a@example.com"), message("b@example.com")])
+    outbox.enqueue(message("c@example.com"))
+    assert outbox.flush(timeout=5)
+
+    assert [result['status'] for result in results] == ['sent', 'sent']
+    assert smtp_server.messages == 3
+    assert smtp_server.connections == 1
+
+
+def test_reconnects_after_server_drops_connection(smtp_server, pool):
+    outbox = Outbox(pool, workers=1, backoff=0.01)
+    outbox.send_batch([message("a@example.com")])
+
+    smtp_server.drop_connections()
+    message_id = outbox.enqueue(message("b@example.com"))
+    assert outbox.flush(timeout=5)
+    smtp_server.drop_connections()
+    results = outbox.send_batch([message("c@example.com")])
+
+    assert outbox.status(message_id)['status'] == 'sent'
+    assert results[0]['status'] == 'sent'
+    assert smtp_server.messages == 3
+    assert smtp_server.connections == 3
+
+
+def test_finished_statuses_are_evicted(smtp_server, pool):
+    outbox = Outbox(pool, workers=1, max_finished=2)
+    ids = [result['message_id'] for result in outbox.send_batch(
+        [message(f"{name}@example.com") for name in "abc"]
+    )]
+
+    outbox.send_batch([message("d@example.com")])
+
+    assert outbox.status(ids[0]) is None
+    assert outbox.status(ids[2])['status'] == 'sent'
+
+
+def test_in_flight_message_is_not_resent_after_drop(smtp_server, pool):
+    outbox = Outbox(pool, workers=1)
+    smtp_server.data_replies = ["drop"]
+
+    results = outbox.send_batch([message("a@example.com"), message("b@example.com")])
+
+    assert [result['status'] for result in results] == ['unknown', 'sent']
+    assert smtp_server.messages == 2
+
+
+def test_permanent_data_error_is_not_retried(smtp_server, pool):
+    outbox = Outbox(pool, workers=1, backoff=0.01)
+    smtp_server.data_replies = ["554 Message rejected"]
+
+    message_id = outbox.enqueue(message("a@example.com"))
+    assert outbox.flush(timeout=5)
+
+    status = outbox.status(message_id)
+    assert status['status'] == 'failed'
+    assert status['attempts'] == 1
+
+
+def test_close_delivers_pending_retries(smtp_server, pool):
+    outbox = Outbox(pool, workers=1, backoff=60)
+    smtp_server.data_replies = ["451 Try again later"]
+
+    message_id = outbox.enqueue(message("a@example.com"))
+    assert outbox.close(timeout=5)
+
+    assert outbox.status(message_id)['status'] == 'sent'
+    assert smtp_server.messages == 1
+    with pytest.raises(RuntimeError):
+        outbox.enqueue(message("b@example.com"))